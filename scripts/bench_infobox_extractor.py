@@ -0,0 +1,158 @@
+"""Micro-benchmark of infobox_extractor against the legacy STAT_PATTERNS loop.
+
+Runs both parsers over a corpus of saved item wikitext and reports the time per
+page plus how often the two disagree on version 1 (mostly `str=` matching
+inside `rstr=` and truncated multi-word values in the legacy parser).
+
+The corpus is either a directory of *.wikitext files, the wikitext batches
+stored in the scrapers' response cache (run the item scraper with --cache
+once to fill it), or with --synthetic the item pages synthetic_wiki.py builds
+from the checked-in data. --save-corpus writes the pages it found out as files.
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sqlite3
+import time
+import zlib
+
+from infobox_extractor import extract_item_versions
+from response_cache import CACHE_FILE_NAME, DEFAULT_CACHE_DIR
+from synthetic_wiki import SyntheticWiki
+
+DEFAULT_REPEATS = 5
+
+LEGACY_STAT_PATTERNS = {
+    "id": re.compile(r"id1?\s*=\s*(\d+)", re.I),
+    "image_name": re.compile(
+        r"image1?\s*=\s*\[\[(File:([A-z ()\-'1-9]*)\.png)\]\]", re.I
+    ),
+    # Attack Bonuses
+    "stab_attack": re.compile(r"astab\s*=\s*([+-]?\d+)", re.I),
+    "slash_attack": re.compile(r"aslash\s*=\s*([+-]?\d+)", re.I),
+    "crush_attack": re.compile(r"acrush\s*=\s*([+-]?\d+)", re.I),
+    "magic_attack": re.compile(r"amagic\s*=\s*([+-]?\d+)", re.I),
+    "ranged_attack": re.compile(r"arange\s*=\s*([+-]?\d+)", re.I),
+    # Defence Bonuses
+    "stab_defence": re.compile(r"dstab\s*=\s*([+-]?\d+)", re.I),
+    "slash_defence": re.compile(r"dslash\s*=\s*([+-]?\d+)", re.I),
+    "crush_defence": re.compile(r"dcrush\s*=\s*([+-]?\d+)", re.I),
+    "magic_defence": re.compile(r"dmagic\s*=\s*([+-]?\d+)", re.I),
+    "ranged_defence": re.compile(r"drange\s*=\s*([+-]?\d+)", re.I),
+    # Other Bonuses
+    "melee_strength": re.compile(r"str\s*=\s*([+-]?\d+)", re.I),
+    "ranged_strength": re.compile(r"rstr\s*=\s*([+-]?\d+)", re.I),
+    "magic_damage": re.compile(r"mdmg\s*=\s*([+-]?\d+(?:\.\d+)?%?)", re.I),
+    "prayer": re.compile(r"prayer\s*=\s*([+-]?\d+)", re.I),
+    "slot": re.compile(r"slot\s*=\s*(\w+)", re.I),
+    "speed": re.compile(r"speed\s*=\s*(\d+)", re.I),
+    "attackrange": re.compile(r"attackrange\s*=\s*(\d+|\w+)", re.I),
+    "combatstyle": re.compile(r"combatstyle\s*=\s*(\w+)", re.I),
+}
+
+
+def legacy_parse(wikitext):
+    """The per-stat regex loop the item scraper used before infobox_extractor."""
+    parsed_stats = {}
+    for stat_key, pattern in LEGACY_STAT_PATTERNS.items():
+        match = pattern.search(wikitext)
+        if match:
+            if stat_key in ["image_name", "slot", "combatstyle"]:
+                parsed_stats[stat_key] = str(match.group(1).strip())
+            else:
+                cleaned_value = match.group(1).strip().replace("+", "").replace("%", "").strip()
+                try:
+                    parsed_stats[stat_key] = float(cleaned_value) if stat_key == "magic_damage" else int(cleaned_value)
+                except ValueError:
+                    parsed_stats[stat_key] = 0
+        else:
+            parsed_stats[stat_key] = 0
+    return parsed_stats
+
+
+def load_corpus_dir(directory):
+    corpus = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.wikitext"))):
+        with open(path, "r", encoding="utf-8") as f:
+            corpus[os.path.splitext(os.path.basename(path))[0]] = f.read()
+    return corpus
+
+
+def load_corpus_cache(cache_dir):
+    """Pulls every page body out of cached prop=revisions responses."""
+    corpus = {}
+    db = sqlite3.connect(os.path.join(cache_dir, CACHE_FILE_NAME))
+    for params, body in db.execute("SELECT params, body FROM responses"):
+        if '"prop":"revisions' not in params or "content" not in params:
+            continue
+        for page in json.loads(zlib.decompress(body)).get("query", {}).get("pages", []):
+            for revision in page.get("revisions", [])[:1]:
+                content = revision.get("slots", {}).get("main", {}).get("content")
+                if content:
+                    corpus[page["title"]] = content
+    db.close()
+    return corpus
+
+
+def time_parser(parse, pages, repeats):
+    """Best of `repeats` passes over the corpus, in microseconds per page."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for wikitext in pages:
+            parse(wikitext)
+        best = min(best, time.perf_counter() - start)
+    return best / len(pages) * 1_000_000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the infobox extractor against the legacy regex loop.")
+    parser.add_argument("--corpus", help="Directory of *.wikitext files")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help=f"Response cache to read wikitext from when --corpus is not given (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="Use item pages synthesized from the checked-in data as the corpus")
+    parser.add_argument("--save-corpus", help="Write the loaded pages to this directory as *.wikitext files")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.synthetic:
+        corpus = SyntheticWiki().item_pages
+    elif args.corpus:
+        corpus = load_corpus_dir(args.corpus)
+    else:
+        corpus = load_corpus_cache(args.cache_dir)
+    if not corpus:
+        raise SystemExit("Corpus is empty: pass --corpus or --synthetic, or run the item scraper with --cache first.")
+
+    if args.save_corpus:
+        os.makedirs(args.save_corpus, exist_ok=True)
+        for title, wikitext in corpus.items():
+            filename = re.sub(r"[^\w\-() ]", "_", title) + ".wikitext"
+            with open(os.path.join(args.save_corpus, filename), "w", encoding="utf-8") as f:
+                f.write(wikitext)
+
+    pages = list(corpus.values())
+    legacy_us = time_parser(legacy_parse, pages, args.repeats)
+    extractor_us = time_parser(extract_item_versions, pages, args.repeats)
+
+    disagreements = 0
+    extra_versions = 0
+    for wikitext in pages:
+        versions = extract_item_versions(wikitext)
+        extra_versions += len(versions) - 1
+        if legacy_parse(wikitext) != versions[0][1]:
+            disagreements += 1
+
+    total_kb = sum(len(page) for page in pages) / 1024
+    print(f"Corpus: {len(pages)} pages, {total_kb:.0f} KB of wikitext")
+    print(f"{'parser':<22} {'us/page':>10}")
+    print(f"{'legacy STAT_PATTERNS':<22} {legacy_us:>10.1f}")
+    print(f"{'infobox_extractor':<22} {extractor_us:>10.1f}")
+    print(f"Speedup: {legacy_us / extractor_us:.2f}x")
+    print(f"Version 1 differs from the legacy parse on {disagreements} pages; {extra_versions} extra versions found")
@@ -0,0 +1,403 @@
+"""Offline throughput benchmark for both scrapers.
+
+Serves recorded api.php responses from a local HTTP stand-in, points the
+monster and item pipelines at it, and runs each one end to end in its own
+process. Reported per pipeline: requests/s, pages/s, peak RSS, and how the
+CPU time splits between the HTTP client and everything else (JSON decoding
+and wikitext parsing), next to the time spent waiting on the network.
+
+Fixtures are the responses recorded by any scraper run with --cache, read
+straight from the cache database, or a portable file written with
+--save-fixtures. The stand-in answers a request when its params match a
+recorded one exactly, so record with the same code you want to benchmark:
+
+    python osrs_scraper_monster_stats.py --cache
+    python osrs_scraper_weapon_armor_stats.py --cache
+    python bench_scrapers.py --latency 50 --error-rate 0.01
+
+Without recorded responses, --synthetic serves the ones synthetic_wiki.py
+builds from the checked-in data, so the benchmark runs on a fresh checkout:
+
+    python bench_scrapers.py --synthetic
+"""
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import os
+import random
+import resource
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from response_cache import CACHE_FILE_NAME, DEFAULT_CACHE_DIR, normalize_params
+from synthetic_wiki import SyntheticWiki
+
+PIPELINES = ["monsters", "items"]
+ERROR_STATUS = 503
+
+
+def load_fixtures(path):
+    """Returns {normalized params: JSON body bytes} from a cache directory or a fixtures file."""
+    fixtures = {}
+    if os.path.isdir(path):
+        db = sqlite3.connect(os.path.join(path, CACHE_FILE_NAME))
+        try:
+            for params, body in db.execute("SELECT params, body FROM responses"):
+                fixtures[params] = zlib.decompress(body)
+        finally:
+            db.close()
+    else:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                fixtures[entry["params"]] = entry["body"].encode("utf-8")
+    return fixtures
+
+
+def save_fixtures(fixtures, filename):
+    with gzip.open(filename, "wt", encoding="utf-8") as f:
+        for params in sorted(fixtures):
+            f.write(json.dumps({"params": params, "body": fixtures[params].decode("utf-8")}) + "\n")
+    print(f"Saved {len(fixtures)} fixtures to {filename}")
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Local api.php that replays fixtures with injected latency and errors."""
+
+    daemon_threads = True
+
+    def __init__(self, fixtures, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset_counters()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/api.php"
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests = 0
+            self.misses = 0
+            self.errors = 0
+            self.bytes_sent = 0
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the wiki
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without this, keep-alive clients stall on delayed ACKs
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self):
+        server = self.server
+        params = dict(parse_qsl(urlsplit(self.path).query, keep_blank_values=True))
+        with server.lock:
+            server.requests += 1
+            delay = max(0.0, server.latency + server.random.uniform(-server.jitter, server.jitter))
+            fail = server.random.random() < server.error_rate
+        time.sleep(delay)
+
+        body = server.fixtures.get(normalize_params(params))
+        if fail:
+            status, body = ERROR_STATUS, b'{"error":{"code":"injected","info":"Injected error"}}'
+            with server.lock:
+                server.errors += 1
+        elif body is None:
+            status, body = 404, b'{"error":{"code":"nofixture","info":"No recorded response"}}'
+            with server.lock:
+                server.misses += 1
+        else:
+            status = 200
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if status == ERROR_STATUS:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(body)
+        with server.lock:
+            server.bytes_sent += len(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# --- Pipeline side, runs in a child process ---
+
+class HttpTimer:
+    """Wraps requests.Session.send to sum wall and CPU time spent inside HTTP calls."""
+
+    def __init__(self):
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.lock = threading.Lock()
+
+    def install(self):
+        import requests
+
+        send = requests.Session.send
+        timer = self
+
+        def timed_send(session, request, **kwargs):
+            wall_start, cpu_start = time.perf_counter(), time.thread_time()
+            try:
+                return send(session, request, **kwargs)
+            finally:
+                wall, cpu = time.perf_counter() - wall_start, time.thread_time() - cpu_start
+                with timer.lock:
+                    timer.wall += wall
+                    timer.cpu += cpu
+
+        requests.Session.send = timed_send
+
+
+def run_monsters(url, workdir, args):
+    import osrs_scraper_monster_stats as monsters
+    from wiki_client import WikiClient
+
+    monsters.client = WikiClient(
+        url, rate=args.rate, burst=max(1, args.workers), pool_size=args.workers, metrics=monsters.metrics
+    )
+    records = monsters.iter_monsters_and_bosses(workers=args.workers, bulk=args.bulk, parse_workers=args.parse_workers)
+    return monsters.write_json_stream(records, os.path.join(workdir, "monsters_bosses.json"))
+
+
+def run_items(url, workdir, args):
+    import osrs_scraper_weapon_armor_stats as items
+    from checkpoint_journal import CheckpointJournal
+    from search_index import save_search_index
+    from wiki_client import WikiClient
+
+    items.client = WikiClient(url, metrics=items.metrics)
+    items.REQUEST_DELAY = args.request_delay
+    items.journal = CheckpointJournal(os.path.join(workdir, "journal.jsonl"))
+    items.resumed_records = {}
+
+    all_items = items.fetch_items(items.collect_unique_titles(items.CATEGORIES_TO_FETCH))
+    items.journal.close()
+    with open(os.path.join(workdir, "weapons_armor_with_stats.json"), "w", encoding="utf-8") as f:
+        json.dump(all_items, f, indent=4, ensure_ascii=False)
+    save_search_index(all_items, os.path.join(workdir, "search_index.json"))
+    return len({item.get("page", item["name"]) for item in all_items.values()})
+
+
+def run_pipeline(name, url, args):
+    """Runs one pipeline against `url` and returns its measurements."""
+    timer = HttpTimer()
+    timer.install()
+    log = sys.stdout if args.verbose else io.StringIO()
+    with tempfile.TemporaryDirectory() as workdir, contextlib.redirect_stdout(log):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        pages = (run_monsters if name == "monsters" else run_items)(url, workdir, args)
+        wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+    # Parse worker processes have exited by now, their CPU time is counted here
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        "pages": pages,
+        "wall_seconds": wall,
+        "cpu_seconds": cpu + children.ru_utime + children.ru_stime,
+        "parse_process_cpu_seconds": children.ru_utime + children.ru_stime,
+        "http_cpu_seconds": timer.cpu,
+        "network_wait_seconds": timer.wall - timer.cpu,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,  # KiB on Linux
+    }
+
+
+# --- Driver ---
+
+def child_command(name, url, args):
+    command = [
+        sys.executable, os.path.abspath(__file__), "--run", name, "--url", url,
+        "--workers", str(args.workers), "--parse-workers", str(args.parse_workers),
+        "--rate", str(args.rate), "--request-delay", str(args.request_delay),
+    ]
+    if args.bulk:
+        command.append("--bulk")
+    if args.verbose:
+        command.append("--verbose")
+    return command
+
+
+def benchmark(server, name, args):
+    server.reset_counters()
+    completed = subprocess.run(
+        child_command(name, server.url, args),
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    if args.verbose:
+        print(completed.stdout, end="")
+    if completed.returncode != 0:
+        raise RuntimeError(f"{name} pipeline exited with status {completed.returncode}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result.update(
+        requests=server.requests,
+        fixture_misses=server.misses,
+        injected_errors=server.errors,
+        bytes_served=server.bytes_sent,
+    )
+    return result
+
+
+def check_bulk(server, args):
+    """Runs the monster scraper per variant and with --bulk, returns the (monster, variant, property) values that differ.
+
+    Both paths have to produce the same records. Pages with more versions than
+    the per-variant path reads only get their shared variants compared.
+    """
+    import osrs_scraper_monster_stats as monsters
+    from wiki_client import WikiClient
+
+    error_rate, server.error_rate = server.error_rate, 0.0  # Compare the data, not the retries
+    runs = []
+    try:
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else io.StringIO()):
+            for bulk in (False, True):
+                monsters.client = WikiClient(server.url, rate=args.rate, burst=max(1, args.workers), pool_size=args.workers)
+                records = monsters.iter_monsters_and_bosses(workers=args.workers, bulk=bulk, parse_workers=0)
+                runs.append({monster["name"]: monster["variants"] for monster in records})
+                monsters.client.close()
+    finally:
+        server.error_rate = error_rate
+
+    browse, bulk = runs
+    differences = []
+    for name in sorted(set(browse) | set(bulk)):
+        if name not in browse or name not in bulk:
+            differences.append((name, None, None, browse.get(name) is not None, bulk.get(name) is not None))
+            continue
+        for variant in set(browse[name]) & set(bulk[name]):
+            browse_stats, bulk_stats = browse[name][variant], bulk[name][variant]
+            for prop in sorted(set(browse_stats) | set(bulk_stats)):
+                if browse_stats.get(prop) != bulk_stats.get(prop):
+                    differences.append((name, variant, prop, browse_stats.get(prop), bulk_stats.get(prop)))
+    return differences
+
+
+def print_report(results):
+    rows = [
+        ("pages", "{pages}"),
+        ("requests", "{requests}"),
+        ("fixture misses", "{fixture_misses}"),
+        ("injected errors", "{injected_errors}"),
+        ("MB served", "{mb_served:.1f}"),
+        ("wall s", "{wall_seconds:.2f}"),
+        ("requests/s", "{requests_per_second:.1f}"),
+        ("pages/s", "{pages_per_second:.1f}"),
+        ("peak RSS MB", "{peak_rss_mb:.1f}"),
+        ("CPU s, total", "{cpu_seconds:.2f}"),
+        ("CPU s, HTTP client", "{http_cpu_seconds:.2f}"),
+        ("CPU s, parse + other", "{parse_cpu_seconds:.2f}"),
+        ("CPU s, parse processes", "{parse_process_cpu_seconds:.2f}"),
+        ("network wait s", "{network_wait_seconds:.2f}"),
+    ]
+    names = list(results)
+    print(f"{'':<22}" + "".join(f"{name:>14}" for name in names))
+    for label, template in rows:
+        print(f"{label:<22}" + "".join(f"{template.format(**results[name]):>14}" for name in names))
+    print("Network wait is summed over all fetch threads, so it can exceed wall time.")
+
+
+def parse_args():
+    from osrs_scraper_monster_stats import DEFAULT_PARSE_WORKERS
+
+    parser = argparse.ArgumentParser(description="Benchmark both scrapers against a local replay of recorded wiki responses.")
+    parser.add_argument("--fixtures", default=DEFAULT_CACHE_DIR,
+                        help=f"Response cache directory or --save-fixtures file to replay (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="Serve responses synthesized from the checked-in data instead of recorded ones")
+    parser.add_argument("--save-fixtures", metavar="FILE",
+                        help="Write the loaded fixtures to a portable .jsonl.gz file and exit")
+    parser.add_argument("--pipelines", nargs="+", choices=PIPELINES, default=PIPELINES)
+    parser.add_argument("--latency", type=float, default=0.0, help="Added delay per response, in milliseconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- jitter on the delay, in milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help=f"Fraction of requests answered with HTTP {ERROR_STATUS} instead of the fixture")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latency jitter and error injection")
+    parser.add_argument("--workers", type=int, default=4, help="Monster scraper fetch workers (default: 4)")
+    parser.add_argument("--parse-workers", type=int, default=DEFAULT_PARSE_WORKERS,
+                        help=f"Monster scraper parse processes, 0 parses on the fetch threads "
+                             f"(default: {DEFAULT_PARSE_WORKERS})")
+    parser.add_argument("--rate", type=float, default=1e6,
+                        help="Monster scraper request rate limit; effectively off by default")
+    parser.add_argument("--request-delay", type=float, default=0.0,
+                        help="Item scraper delay between batches; off by default")
+    parser.add_argument("--bulk", action="store_true", help="Run the monster scraper in --bulk mode")
+    parser.add_argument("--check-bulk", action="store_true",
+                        help="Also check that --bulk and the per-variant monster scraper produce the same records")
+    parser.add_argument("--report", metavar="FILE", help="Also write the results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show the scrapers' own output")
+    # Internal: run a single pipeline in this process and print its measurements
+    parser.add_argument("--run", choices=PIPELINES, help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.synthetic and args.save_fixtures:
+        parser.error("--synthetic responses are built per request, there are no fixtures to save")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.run:
+        print(json.dumps(run_pipeline(args.run, args.url, args)))
+        sys.exit(0)
+
+    if args.synthetic:
+        fixtures = SyntheticWiki()
+        print(f"Synthesizing responses for {len(fixtures)} pages from the checked-in data")
+    else:
+        fixtures = load_fixtures(args.fixtures)
+        print(f"Loaded {len(fixtures)} recorded responses from {args.fixtures}")
+    if args.save_fixtures:
+        save_fixtures(fixtures, args.save_fixtures)
+        sys.exit(0)
+
+    server = StandInServer(fixtures, args.latency / 1000, args.jitter / 1000, args.error_rate, args.seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    results = {}
+    try:
+        for name in args.pipelines:
+            print(f"Running the {name} pipeline against {server.url}...")
+            result = benchmark(server, name, args)
+            result.update(
+                mb_served=result["bytes_served"] / 1024 / 1024,
+                requests_per_second=result["requests"] / result["wall_seconds"],
+                pages_per_second=result["pages"] / result["wall_seconds"],
+                parse_cpu_seconds=result["cpu_seconds"] - result["http_cpu_seconds"],
+            )
+            results[name] = result
+        if args.check_bulk:
+            print("Comparing --bulk records against the per-variant scraper...")
+            differences = check_bulk(server, args)
+    finally:
+        server.shutdown()
+
+    print_report(results)
+    if args.check_bulk:
+        for name, variant, prop, browse_value, bulk_value in differences[:20]:
+            print(f"  {name} / {variant} / {prop}: per variant {browse_value!r}, bulk {bulk_value!r}")
+        print(f"Bulk check: {len(differences)} differences")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=4)
+        print(f"Report saved to {args.report}")
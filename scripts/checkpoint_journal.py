@@ -0,0 +1,73 @@
+"""Append-only JSONL checkpoint journal for long scraper runs.
+
+Each processed title is written as one line, `{"title": ..., "record": ...}`,
+with `record` set to null for titles that were skipped. Lines are buffered and
+flushed in batches, so a checkpoint costs one small append instead of
+re-serializing everything fetched so far. After a crash the journal is read
+back and every title in it is skipped on the next run.
+"""
+import json
+import os
+
+DEFAULT_FLUSH_EVERY = 50
+
+
+class CheckpointJournal:
+    def __init__(self, path, flush_every=DEFAULT_FLUSH_EVERY):
+        self.path = path
+        self.flush_every = flush_every
+        self.pending = []
+        self.file = None
+
+    def load(self):
+        """Returns the records of an interrupted run, keyed by title (later lines win).
+
+        A partial last line left by a crash is dropped and trimmed off the file
+        so new appends start on a clean line.
+        """
+        processed = {}
+        if not os.path.exists(self.path):
+            return processed
+
+        with open(self.path, "rb+") as f:
+            content = f.read()
+            complete = content.rfind(b"\n") + 1
+            if complete != len(content):
+                f.truncate(complete)
+
+        for line in content[:complete].splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            processed[entry["title"]] = entry.get("record")
+        return processed
+
+    def append(self, title, record):
+        self.pending.append(json.dumps({"title": title, "record": record}, ensure_ascii=False))
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        if self.file is None:
+            self.file = open(self.path, "a", encoding="utf-8")
+        self.file.write("\n".join(self.pending) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def remove(self):
+        """Deletes the journal once its contents have been compacted into the final output."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,100 @@
+"""Python mirrors of the accuracy formulas in frontend/src/utils/hit-chance.ts.
+
+Used by the monster scraper to precompute defence rolls for every variant and
+attack style, and optionally a hit-chance table indexed by attack roll bucket,
+so switching targets in the calculator is a lookup rather than a
+recomputation.
+
+The table has one row per distinct defence roll (variants point at theirs
+through Defence_rolls) with the exact hit chance at every edge of
+ATTACK_ROLL_EDGES:
+
+    {"edges": [0, 1, 2, 4, ..., 32, 35, 38, 42, ...], "chances": {"640": [0.0, 0.0008, ...], ...}}
+
+The hit chance only grows with the attack roll, so for a roll in bucket i,
+edges[i] <= roll < edges[i + 1], the exact chance lies between chances[i]
+and chances[i + 1]. The edges grow by 10% per bucket, so interpolating
+linearly between the two stays close at every attack roll size: within
+0.002 of the exact chance for every defence roll in the current monster
+data (2,400 against 640 reads 0.8660, exactly 0.8663).
+"""
+
+# Style -> (level property, defence bonus property)
+DEFENCE_ROLL_STYLES = {
+    "stab": ("Defence_level", "Stab_defence_bonus"),
+    "slash": ("Defence_level", "Slash_defence_bonus"),
+    "crush": ("Defence_level", "Crush_defence_bonus"),
+    # NPCs defend against magic with their magic level, not their defence level
+    "magic": ("Magic_level", "Magic_defence_bonus"),
+    "light": ("Defence_level", "Light_range_defence_bonus"),
+    "standard": ("Defence_level", "Standard_range_defence_bonus"),
+    "heavy": ("Defence_level", "Heavy_range_defence_bonus"),
+}
+ATTACK_ROLL_EDGE_GROWTH = 1.1
+MAX_ATTACK_ROLL = 400_000
+# 0, 1, 2, 4, ... 32, then growing by ATTACK_ROLL_EDGE_GROWTH until past MAX_ATTACK_ROLL
+ATTACK_ROLL_EDGES = [0] + [2 ** i for i in range(6)]
+while ATTACK_ROLL_EDGES[-1] < MAX_ATTACK_ROLL:
+    ATTACK_ROLL_EDGES.append(max(ATTACK_ROLL_EDGES[-1] + 1, round(ATTACK_ROLL_EDGES[-1] * ATTACK_ROLL_EDGE_GROWTH)))
+
+
+def as_int(value, default=0):
+    """Reads scraped numbers, which may be ints or numeric strings such as "+12"."""
+    if isinstance(value, bool):
+        return default
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        return int(str(value).strip().replace("+", ""))
+    except (TypeError, ValueError):
+        return default
+
+
+def calculate_defence_roll(defence_level, style_defence_bonus):
+    return (defence_level + 9) * (style_defence_bonus + 64)
+
+
+def calculate_hit_chance(attack_roll, defence_roll):
+    if attack_roll > defence_roll:
+        return 1 - (defence_roll + 2) / (2 * (attack_roll + 1))
+    return attack_roll / (2 * (defence_roll + 1))
+
+
+def variant_defence_rolls(variant):
+    """Defence roll of a monster variant against each attack style.
+
+    Returns None when the variant has no usable defence level.
+    """
+    if as_int(variant.get("Defence_level"), None) is None:
+        return None
+    rolls = {}
+    for style, (level_property, bonus_property) in DEFENCE_ROLL_STYLES.items():
+        level = as_int(variant.get(level_property))
+        rolls[style] = calculate_defence_roll(level, as_int(variant.get(bonus_property)))
+    return rolls
+
+
+def add_defence_rolls(monster):
+    """Stores Defence_rolls on every variant of a monster record that has a defence level."""
+    for variant in monster["variants"].values():
+        rolls = variant_defence_rolls(variant)
+        if rolls is not None:
+            variant["Defence_rolls"] = rolls
+    return monster
+
+
+def hit_chance_table(monsters, edges=ATTACK_ROLL_EDGES):
+    """Exact hit chance at every attack roll edge, for each distinct defence roll of the monsters."""
+    defence_rolls = set()
+    for monster in monsters:
+        for variant in monster["variants"].values():
+            rolls = variant.get("Defence_rolls") or variant_defence_rolls(variant)
+            if rolls is not None:
+                defence_rolls.update(rolls.values())
+    return {
+        "edges": edges,
+        "chances": {
+            str(defence_roll): [round(calculate_hit_chance(edge, defence_roll), 4) for edge in edges]
+            for defence_roll in sorted(defence_rolls)
+        },
+    }
@@ -0,0 +1,412 @@
+"""Vectorized best-in-slot sweep over the full item table.
+
+Evaluates the same DPS formula as frontend/src/utils/dps.ts (calculateDps,
+with calculateHitChance and calculateMaxHit) for every melee and ranged weapon,
+every attack style, and every monster variant at once with NumPy, and writes
+the best loadout per monster variant and combat class.
+
+Searching every combination of gear directly is hopeless, but for a fixed
+weapon style the DPS only depends on the summed accuracy bonus and summed
+strength bonus of the other slots, and it never decreases as either one
+grows. So each slot is reduced to its Pareto front of (accuracy, strength),
+since items dominated on both can never be part of a best loadout, and the
+slot fronts are combined one slot at a time, pruning after each step. What is
+left is a few hundred candidate gear totals per attack type, which are
+evaluated against every monster variant as one array operation per weapon
+style.
+
+Magic is not swept: its max hit comes from the spell, not from gear.
+"""
+import argparse
+import json
+import re
+
+import numpy as np
+
+from combat_math import as_int, variant_defence_rolls
+
+ITEMS_FILE = "../frontend/public/weapons_armor_with_stats.json"
+MONSTERS_FILE = "../frontend/public/monsters_bosses.json"
+COMBAT_STYLES_FILE = "../frontend/public/combatStyles.json"
+OUTPUT_FILE = "../frontend/public/best_in_slot.json"
+
+GEAR_SLOTS = ["head", "cape", "neck", "ammo", "body", "legs", "shield", "hands", "feet", "ring"]
+WEAPON_SLOTS = ["weapon", "2h"]
+MELEE_ATTACK_TYPES = ["Stab", "Slash", "Crush"]
+RANGED_ATTACK_TYPES = ["Standard", "Light", "Heavy"]
+
+# Ammo by tier, each launcher fires its own tier and every tier below it
+ARROW_TIERS = [
+    ["Bronze arrow", "Bronze fire arrow", "Ice arrows", "Broad arrows"],
+    ["Iron arrow", "Iron fire arrow"],
+    ["Steel arrow", "Steel fire arrow"],
+    ["Mithril arrow", "Mithril fire arrow"],
+    ["Adamant arrow", "Adamant fire arrow"],
+    ["Rune arrow", "Rune fire arrow"],
+    ["Amethyst arrow", "Amethyst fire arrow"],
+    ["Dragon arrow", "Dragon fire arrow"],
+]
+BOLT_TIERS = [
+    ["Bronze bolts", "Opal bolts", "Opal bolts (e)", "Silver bolts"],
+    ["Blurite bolts", "Jade bolts", "Jade bolts (e)"],
+    ["Iron bolts", "Pearl bolts", "Pearl bolts (e)"],
+    ["Steel bolts", "Topaz bolts", "Topaz bolts (e)"],
+    ["Mithril bolts", "Sapphire bolts", "Sapphire bolts (e)", "Emerald bolts", "Emerald bolts (e)"],
+    ["Adamant bolts", "Ruby bolts", "Ruby bolts (e)", "Diamond bolts", "Diamond bolts (e)"],
+    ["Runite bolts", "Broad bolts", "Amethyst broad bolts", "Dragonstone bolts", "Dragonstone bolts (e)",
+     "Onyx bolts", "Onyx bolts (e)"],
+    ["Dragon bolts"] + [
+        f"{gem} dragon bolts{enchanted}"
+        for gem in ["Opal", "Jade", "Pearl", "Topaz", "Sapphire", "Emerald", "Ruby", "Diamond", "Dragonstone", "Onyx"]
+        for enchanted in ["", " (e)"]
+    ],
+]
+JAVELINS = ["Bronze javelin", "Iron javelin", "Steel javelin", "Mithril javelin", "Adamant javelin",
+            "Rune javelin", "Amethyst javelin", "Dragon javelin"]
+
+
+def up_to(tiers, highest):
+    """Every ammo name from the lowest tier up to the one starting with `highest`."""
+    last = next(i for i, tier in enumerate(tiers) if tier[0] == highest)
+    return tuple(name for tier in tiers[:last + 1] for name in tier)
+
+
+# Launcher -> ammo it fires. An empty entry is a bow that makes its own ammo
+# (crystal, Craw's, ...), which gets no ranged strength from the ammo slot.
+# Launchers missing here are reported and swept without ammo.
+LAUNCHER_AMMO = {
+    "Training bow": ("Training arrows",),
+    "Starter bow": (),
+    "Shortbow": up_to(ARROW_TIERS, "Iron arrow"),
+    "Longbow": up_to(ARROW_TIERS, "Iron arrow"),
+    "Oak shortbow": up_to(ARROW_TIERS, "Steel arrow"),
+    "Oak longbow": up_to(ARROW_TIERS, "Steel arrow"),
+    "Signed oak bow": up_to(ARROW_TIERS, "Steel arrow"),
+    "Willow shortbow": up_to(ARROW_TIERS, "Mithril arrow"),
+    "Willow longbow": up_to(ARROW_TIERS, "Mithril arrow"),
+    "Willow comp bow": up_to(ARROW_TIERS, "Mithril arrow"),
+    "Maple shortbow": up_to(ARROW_TIERS, "Adamant arrow"),
+    "Maple longbow": up_to(ARROW_TIERS, "Adamant arrow"),
+    "Yew shortbow": up_to(ARROW_TIERS, "Rune arrow"),
+    "Yew longbow": up_to(ARROW_TIERS, "Rune arrow"),
+    "Yew comp bow": up_to(ARROW_TIERS, "Rune arrow"),
+    "Rain bow": up_to(ARROW_TIERS, "Rune arrow"),
+    "Bone shortbow": up_to(ARROW_TIERS, "Rune arrow"),
+    "Magic shortbow": up_to(ARROW_TIERS, "Amethyst arrow"),
+    "Magic shortbow (i)": up_to(ARROW_TIERS, "Amethyst arrow"),
+    "Magic longbow": up_to(ARROW_TIERS, "Amethyst arrow"),
+    "Magic comp bow": up_to(ARROW_TIERS, "Amethyst arrow"),
+    "Seercull": up_to(ARROW_TIERS, "Amethyst arrow"),
+    "3rd age bow": up_to(ARROW_TIERS, "Amethyst arrow"),
+    "Dark bow": up_to(ARROW_TIERS, "Dragon arrow"),
+    "Twisted bow": up_to(ARROW_TIERS, "Dragon arrow"),
+    "Venator bow": up_to(ARROW_TIERS, "Dragon arrow"),
+    "Echo venator bow": up_to(ARROW_TIERS, "Dragon arrow"),
+    "Scorching bow": up_to(ARROW_TIERS, "Dragon arrow"),
+    "Ogre bow": ("Ogre arrow",),
+    "Comp ogre bow": ("Ogre arrow",),
+    "Crystal bow": (),
+    "Crystal bow (i)": (),
+    "Bow of faerdhinen": (),
+    "Bow of faerdhinen (c)": (),
+    "Craw's bow": (),
+    "Webweaver bow": (),
+    "Eclipse atlatl": (),
+    "Bronze crossbow": up_to(BOLT_TIERS, "Bronze bolts"),
+    "Blurite crossbow": up_to(BOLT_TIERS, "Blurite bolts"),
+    "Iron crossbow": up_to(BOLT_TIERS, "Iron bolts"),
+    "Steel crossbow": up_to(BOLT_TIERS, "Steel bolts"),
+    "Mithril crossbow": up_to(BOLT_TIERS, "Mithril bolts"),
+    "Adamant crossbow": up_to(BOLT_TIERS, "Adamant bolts"),
+    "Rune crossbow": up_to(BOLT_TIERS, "Runite bolts"),
+    "Dragon crossbow": up_to(BOLT_TIERS, "Dragon bolts"),
+    "Armadyl crossbow": up_to(BOLT_TIERS, "Dragon bolts"),
+    "Zaryte crossbow": up_to(BOLT_TIERS, "Dragon bolts"),
+    "Dorgeshuun crossbow": ("Bone bolts",) + up_to(BOLT_TIERS, "Bronze bolts"),
+    "Hunters' crossbow": ("Kebbit bolts", "Long kebbit bolts"),
+    "Hunters' sunlight crossbow": ("Sunlight antler bolts", "Moonlight antler bolts"),
+    "Light ballista": tuple(JAVELINS),
+    "Heavy ballista": tuple(JAVELINS),
+}
+NO_AMMO = ()
+
+PIETY = (1.20, 1.23)
+RIGOUR = (1.20, 1.23)
+BOOST_PATTERN = re.compile(r"\+(\d+)\s+([^+]+)")
+
+
+def parse_boosts(boost):
+    """Turns a combat style boost such as "+1 Attack, Strength, Defence" into {skill: levels}."""
+    boosts = {}
+    for amount, skills in BOOST_PATTERN.findall(boost or ""):
+        for skill in skills.split(","):
+            if skill.strip():
+                boosts[skill.strip()] = int(amount)
+    return boosts
+
+
+def find_style_category(combat_styles, combatstyle):
+    """Maps an item's combatstyle to its combatStyles.json key, ignoring case.
+
+    Items scraped before infobox_extractor only kept the first word, so
+    "Bladed Staff" may be stored as "Bladed".
+    """
+    if not isinstance(combatstyle, str):
+        return None
+    wanted = combatstyle.strip().lower()
+    for category in combat_styles:
+        if category.lower() == wanted:
+            return category
+    for category in combat_styles:
+        if category.split(" ")[0].lower() == wanted:
+            return category
+    return None
+
+
+def pareto_front(accuracy, strength):
+    """Indices of the points not dominated on both accuracy and strength."""
+    order = np.lexsort((-strength, -accuracy))  # Accuracy descending, then strength descending
+    sorted_strength = strength[order]
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = sorted_strength[1:] > np.maximum.accumulate(sorted_strength)[:-1]
+    return order[keep]
+
+
+def slot_candidates(items, slot, accuracy_stat, strength_stat, include=None):
+    """Non-dominated items for one slot as (accuracy, strength, ids), including an empty slot."""
+    chosen = [item for item in items if item["stats"]["slot"] == slot and (include is None or include(item))]
+    accuracy = np.array([0] + [as_int(item["stats"][accuracy_stat]) for item in chosen], dtype=np.int64)
+    strength = np.array([0] + [as_int(item["stats"][strength_stat]) for item in chosen], dtype=np.int64)
+    ids = np.array([-1] + [as_int(item["id"]) for item in chosen], dtype=np.int64)
+    keep = pareto_front(accuracy, strength)
+    return accuracy[keep], strength[keep], ids[keep]
+
+
+def combine_slots(candidates):
+    """Combines per-slot fronts one slot at a time, keeping only non-dominated totals.
+
+    Returns the total accuracy and strength of every surviving loadout and an
+    (n, slots) array with the item id worn in each slot (-1 for empty).
+    """
+    accuracy = np.zeros(1, dtype=np.int64)
+    strength = np.zeros(1, dtype=np.int64)
+    ids = np.zeros((1, 0), dtype=np.int64)
+    for slot_accuracy, slot_strength, slot_ids in candidates:
+        total_accuracy = (accuracy[:, None] + slot_accuracy[None, :]).ravel()
+        total_strength = (strength[:, None] + slot_strength[None, :]).ravel()
+        keep = pareto_front(total_accuracy, total_strength)
+        left, right = np.divmod(keep, len(slot_accuracy))
+        ids = np.column_stack([ids[left], slot_ids[right]])
+        accuracy, strength = total_accuracy[keep], total_strength[keep]
+    return accuracy, strength, ids
+
+
+def gear_front(items, combat_class, attack_type, two_handed, ammo):
+    """Non-dominated gear totals for every slot but the weapon."""
+    if combat_class == "melee":
+        accuracy_stat, strength_stat = f"{attack_type.lower()}_attack", "melee_strength"
+    else:
+        accuracy_stat, strength_stat = "ranged_attack", "ranged_strength"
+
+    candidates = []
+    for slot in GEAR_SLOTS:
+        if slot == "shield" and two_handed:
+            continue
+        include = None
+        if slot == "ammo" and combat_class == "ranged":
+            include = lambda item: item["name"] in ammo
+        candidates.append(slot_candidates(items, slot, accuracy_stat, strength_stat, include))
+    return combine_slots(candidates)
+
+
+def weapon_styles(items, combat_styles):
+    """Every melee and ranged (weapon, style) pair, with dominated weapons pruned.
+
+    Weapons that share an attack type, speed, style boosts, handedness and ammo
+    are compared on (accuracy, strength) and only the front is kept.
+    """
+    groups = {}
+    unknown_launchers = set()
+    for item in items:
+        stats = item["stats"]
+        if stats["slot"] not in WEAPON_SLOTS:
+            continue
+        category = find_style_category(combat_styles, stats["combatstyle"])
+        if category is None:
+            continue
+        for style in combat_styles[category]["styles"]:
+            attack_type = style["attack_type"]
+            boosts = parse_boosts(style.get("boost"))
+            speed = as_int(stats["speed"])
+            if attack_type in MELEE_ATTACK_TYPES:
+                combat_class = "melee"
+                accuracy = as_int(stats[f"{attack_type.lower()}_attack"])
+                strength = as_int(stats["melee_strength"])
+                accuracy_boost, strength_boost = boosts.get("Attack", 0), boosts.get("Strength", 0)
+                ammo = NO_AMMO
+            elif attack_type in RANGED_ATTACK_TYPES:
+                combat_class = "ranged"
+                accuracy = as_int(stats["ranged_attack"])
+                strength = as_int(stats["ranged_strength"])
+                accuracy_boost = strength_boost = boosts.get("Ranged", 0)
+                ammo = NO_AMMO
+                if category in ("Bow", "Crossbow"):
+                    if item["name"] not in LAUNCHER_AMMO:
+                        unknown_launchers.add(item["name"])
+                    ammo = LAUNCHER_AMMO.get(item["name"], NO_AMMO)
+                if style["style"] == "Rapid":
+                    speed -= 1
+            else:
+                continue
+            if speed <= 0:
+                continue
+
+            key = (combat_class, attack_type, speed, accuracy_boost, strength_boost, stats["slot"] == "2h", ammo)
+            groups.setdefault(key, []).append((accuracy, strength, item, style))
+    if unknown_launchers:
+        print(f"No ammo listed for {len(unknown_launchers)} launcher(s), swept without: {', '.join(sorted(unknown_launchers))}")
+
+    candidates = []
+    for key, members in groups.items():
+        accuracy = np.array([member[0] for member in members], dtype=np.int64)
+        strength = np.array([member[1] for member in members], dtype=np.int64)
+        for index in pareto_front(accuracy, strength):
+            candidates.append((key, members[index]))
+    return candidates
+
+
+def monster_variants(monsters):
+    """Flattens monsters into variant rows and defence roll arrays per attack type.
+
+    Uses the Defence_rolls the monster scraper stores on each variant, and
+    combat_math.variant_defence_rolls for data scraped before it did.
+    Variants without a defence level are left out.
+    """
+    rows = []
+    variant_rolls = []
+    for monster in monsters:
+        for variant_name, variant in monster["variants"].items():
+            rolls = variant.get("Defence_rolls") or variant_defence_rolls(variant)
+            if rolls is None:
+                continue
+            rows.append((monster["name"], variant_name, variant))
+            variant_rolls.append(rolls)
+
+    defence_rolls = {
+        attack_type: np.array([rolls[attack_type.lower()] for rolls in variant_rolls], dtype=np.int64)
+        for attack_type in MELEE_ATTACK_TYPES + RANGED_ATTACK_TYPES
+    }
+    return rows, defence_rolls
+
+
+def effective_level(level, prayer_multiplier, style_bonus):
+    return np.floor(np.floor(level * prayer_multiplier) + style_bonus + 8)
+
+
+def sweep_dps(accuracy_totals, strength_totals, attack_level, strength_level, prayers, style, speed, defence_roll):
+    """DPS of every gear total (rows) against every monster variant (columns)."""
+    attack_prayer, strength_prayer = prayers
+    accuracy_boost, strength_boost = style
+    attack_roll = np.floor(effective_level(attack_level, attack_prayer, accuracy_boost) * (accuracy_totals + 64))
+    max_hit = np.floor(0.5 + effective_level(strength_level, strength_prayer, strength_boost) * (strength_totals + 64) / 640)
+
+    attack_roll = attack_roll[:, None]
+    defence_roll = defence_roll[None, :].astype(np.float64)
+    hit_chance = np.where(
+        attack_roll > defence_roll,
+        1 - (defence_roll + 2) / (2 * (attack_roll + 1)),
+        attack_roll / (2 * (defence_roll + 1)),
+    )
+    max_hit = max_hit[:, None]
+    return ((max_hit / 2 + 1 / (max_hit + 1)) * hit_chance) / (speed * 0.6)
+
+
+def best_in_slot(items, monsters, combat_styles, levels, prayers):
+    rows, defence_rolls = monster_variants(monsters)
+    variant_count = len(rows)
+    best = {}
+    fronts = {}
+
+    for key, (weapon_accuracy, weapon_strength, weapon, style) in weapon_styles(items, combat_styles):
+        combat_class, attack_type, speed, accuracy_boost, strength_boost, two_handed, ammo = key
+        front_key = (combat_class, attack_type, two_handed, ammo)
+        if front_key not in fronts:
+            fronts[front_key] = gear_front(items, combat_class, attack_type, two_handed, ammo)
+        gear_accuracy, gear_strength, gear_ids = fronts[front_key]
+
+        if combat_class == "melee":
+            attack_level, strength_level = levels["attack"], levels["strength"]
+        else:
+            attack_level = strength_level = levels["ranged"]
+        dps = sweep_dps(
+            gear_accuracy + weapon_accuracy,
+            gear_strength + weapon_strength,
+            attack_level,
+            strength_level,
+            prayers[combat_class],
+            (accuracy_boost, strength_boost),
+            speed,
+            defence_rolls[attack_type],
+        )
+        best_row = dps.argmax(axis=0)
+        best_dps = dps[best_row, np.arange(variant_count)]
+
+        if combat_class not in best:
+            best[combat_class] = {
+                "dps": np.full(variant_count, -1.0),
+                "choice": [None] * variant_count,
+            }
+        current = best[combat_class]
+        for variant_index in np.nonzero(best_dps > current["dps"])[0]:
+            current["choice"][variant_index] = (weapon, style, attack_type, gear_ids[best_row[variant_index]], two_handed)
+        current["dps"] = np.maximum(current["dps"], best_dps)
+
+    results = {}
+    for variant_index, (monster_name, variant_name, _) in enumerate(rows):
+        loadouts = {}
+        for combat_class, current in best.items():
+            choice = current["choice"][variant_index]
+            if choice is None:
+                continue
+            weapon, style, attack_type, ids, two_handed = choice
+            slots = [slot for slot in GEAR_SLOTS if not (slot == "shield" and two_handed)]
+            loadouts[combat_class] = {
+                "dps": round(float(current["dps"][variant_index]), 4),
+                "weapon": as_int(weapon["id"]),
+                "stance": style["stance"],
+                "attack_type": attack_type,
+                "gear": {slot: int(item_id) for slot, item_id in zip(slots, ids) if item_id >= 0},
+            }
+        results.setdefault(monster_name, {})[variant_name] = loadouts
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Precompute best-in-slot loadouts per monster variant.")
+    parser.add_argument("--attack-level", type=int, default=99)
+    parser.add_argument("--strength-level", type=int, default=99)
+    parser.add_argument("--ranged-level", type=int, default=99)
+    parser.add_argument("--prayers", action="store_true", help="Assume Piety for melee and Rigour for ranged")
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with open(ITEMS_FILE, "r", encoding="utf-8") as f:
+        items = list(json.load(f).values())
+    with open(MONSTERS_FILE, "r", encoding="utf-8") as f:
+        monsters = json.load(f)
+    with open(COMBAT_STYLES_FILE, "r", encoding="utf-8") as f:
+        combat_styles = json.load(f)
+
+    levels = {"attack": args.attack_level, "strength": args.strength_level, "ranged": args.ranged_level}
+    prayers = {
+        "melee": PIETY if args.prayers else (1.0, 1.0),
+        "ranged": RIGOUR if args.prayers else (1.0, 1.0),
+    }
+    results = best_in_slot(items, monsters, combat_styles, levels, prayers)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, separators=(",", ":"))
+    print(f"Best-in-slot tables for {len(results)} monsters saved to {args.output}")
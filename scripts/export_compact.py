@@ -0,0 +1,172 @@
+"""Exports the scraped item and monster data as typed, minified, columnar JSON.
+
+The scrapers write one pretty-printed object per record, and the monster data
+keeps every number as a string. This stage flattens each dataset into a
+struct-of-arrays layout:
+
+    {
+        "count": 2557,
+        "types": {"Hitpoints": "int", "Attack_style": "enum", ...},
+        "columns": {"Hitpoints": [100, 250, ...], "Attack_style": [0, 3, ...], ...},
+        "enums": {"Attack_style": ["Crush", "Magic", ...]}
+    }
+
+Numeric columns are coerced to ints or floats, missing values become null, and
+low-cardinality string columns are dictionary-encoded, so the frontend reads
+each column as a flat array instead of walking thousands of objects.
+Identifier columns (IDENTIFIER_COLUMNS) are typed "id" and keep their scraped
+values: NPC_ID stays a string, because saved loadouts compare it by equality.
+"""
+import argparse
+import gzip
+import json
+import re
+import statistics
+import time
+
+ITEMS_FILE = "../frontend/public/weapons_armor_with_stats.json"
+MONSTERS_FILE = "../frontend/public/monsters_bosses.json"
+ITEMS_COLUMNS_FILE = "../frontend/public/weapons_armor_with_stats.columns.json"
+MONSTERS_COLUMNS_FILE = "../frontend/public/monsters_bosses.columns.json"
+ENUM_MAX_DISTINCT = 256
+IDENTIFIER_COLUMNS = {"id", "NPC_ID"}
+PARSE_TIMING_RUNS = 5
+
+INT_PATTERN = re.compile(r"^[+-]?\d+$")
+FLOAT_PATTERN = re.compile(r"^[+-]?(\d+\.?\d*|\.\d+)$")
+
+
+def flatten(record, prefix=""):
+    """Flattens nested dicts into dotted column names, e.g. stats.stab_attack."""
+    row = {}
+    for key, value in record.items():
+        if isinstance(value, dict):
+            row.update(flatten(value, f"{prefix}{key}."))
+        else:
+            row[f"{prefix}{key}"] = value
+    return row
+
+
+def as_number(value):
+    """Returns an int or float for numeric values and numeric strings, else None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        text = value.strip()
+        if INT_PATTERN.match(text):
+            return int(text)
+        if FLOAT_PATTERN.match(text):
+            return float(text)
+    return None
+
+
+def coerce_column(values):
+    """Picks the narrowest type that fits every non-null value of a column.
+
+    Returns (type, column, enum_values); enum_values is None unless the column
+    was dictionary-encoded.
+    """
+    present = [value for value in values if value is not None and value != ""]
+    numbers = [as_number(value) for value in present]
+
+    if present and all(number is not None for number in numbers):
+        if all(isinstance(number, int) or number.is_integer() for number in numbers):
+            return "int", [None if v is None or v == "" else int(as_number(v)) for v in values], None
+        return "float", [None if v is None or v == "" else float(as_number(v)) for v in values], None
+
+    distinct = list(dict.fromkeys(present))
+    if len(distinct) <= ENUM_MAX_DISTINCT and len(distinct) * 4 <= len(values):
+        codes = {value: code for code, value in enumerate(distinct)}
+        return "enum", [None if v is None or v == "" else codes[v] for v in values], distinct
+    return "str", [None if v == "" else v for v in values], None
+
+
+def to_columns(rows):
+    """Turns a list of flat row dicts into the columnar export layout."""
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    export = {"count": len(rows), "types": {}, "columns": {}, "enums": {}}
+    for name in names:
+        if name in IDENTIFIER_COLUMNS:
+            export["types"][name] = "id"
+            export["columns"][name] = [None if row.get(name) == "" else row.get(name) for row in rows]
+            continue
+        kind, column, enum_values = coerce_column([row.get(name) for row in rows])
+        export["types"][name] = kind
+        export["columns"][name] = column
+        if enum_values is not None:
+            export["enums"][name] = enum_values
+    return export
+
+
+def item_rows(items):
+    return [flatten(item) for item in items.values()]
+
+
+def monster_rows(monsters):
+    """One row per monster variant, carrying the monster name and variant name."""
+    rows = []
+    for monster in monsters:
+        for variant_name, variant in monster["variants"].items():
+            row = {"name": monster["name"], "variant": variant_name}
+            if "lastrevid" in monster:
+                row["lastrevid"] = monster["lastrevid"]
+            row.update(flatten(variant))
+            rows.append(row)
+    return rows
+
+
+def write_minified(data, filename):
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    print(f"Data successfully saved to {filename}")
+
+
+def median_parse_ms(raw):
+    timings = []
+    for _ in range(PARSE_TIMING_RUNS):
+        start = time.perf_counter()
+        json.loads(raw)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def compare_files(pairs):
+    """Prints raw size, gzipped size and median json.loads time of each original/export pair."""
+    print(f"\n{'file':<45} {'bytes':>10} {'gzip':>10} {'parse ms':>9}")
+    for original, exported in pairs:
+        for filename in (original, exported):
+            with open(filename, "rb") as f:
+                raw = f.read()
+            print(
+                f"{filename.rsplit('/', 1)[-1]:<45} {len(raw):>10,} "
+                f"{len(gzip.compress(raw)):>10,} {median_parse_ms(raw):>9.1f}"
+            )
+
+
+def export_items(filename=ITEMS_FILE, output=ITEMS_COLUMNS_FILE):
+    with open(filename, "r", encoding="utf-8") as f:
+        items = json.load(f)
+    write_minified(to_columns(item_rows(items)), output)
+
+
+def export_monsters(filename=MONSTERS_FILE, output=MONSTERS_COLUMNS_FILE):
+    with open(filename, "r", encoding="utf-8") as f:
+        monsters = json.load(f)
+    write_minified(to_columns(monster_rows(monsters)), output)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export the scraped data as typed, columnar JSON.")
+    parser.add_argument("--compare", action="store_true",
+                        help="Print a size and parse-time comparison against the original files")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    export_items()
+    export_monsters()
+    if args.compare:
+        compare_files([(ITEMS_FILE, ITEMS_COLUMNS_FILE), (MONSTERS_FILE, MONSTERS_COLUMNS_FILE)])
@@ -0,0 +1,162 @@
+"""Single-pass extraction of item stats from Infobox Item / Infobox Bonuses.
+
+The old STAT_PATTERNS approach ran about twenty regexes over the full page,
+took the first match anywhere (so `str=` could match inside `rstr=`), and only
+ever saw version 1 of switch infoboxes. Here the page is scanned once for the
+start of the two infoboxes, each infobox body is tokenized once (every `{{`,
+`}}`, `[[`, `]]` and `|`) and split into parameters at its own nesting level,
+and the parameters are mapped to stats for every version (`astab1`, `astab2`,
+...).
+"""
+import functools
+import re
+
+INFOBOX_TEMPLATES = ("infobox item", "infobox bonuses")
+
+# Wiki parameter -> stat key, in the order the output file has always used
+STAT_PARAMS = {
+    "id": "id",
+    "image": "image_name",
+    # Attack Bonuses
+    "astab": "stab_attack",
+    "aslash": "slash_attack",
+    "acrush": "crush_attack",
+    "amagic": "magic_attack",
+    "arange": "ranged_attack",
+    # Defence Bonuses
+    "dstab": "stab_defence",
+    "dslash": "slash_defence",
+    "dcrush": "crush_defence",
+    "dmagic": "magic_defence",
+    "drange": "ranged_defence",
+    # Other Bonuses
+    "str": "melee_strength",
+    "rstr": "ranged_strength",
+    "mdmg": "magic_damage",
+    "prayer": "prayer",
+    "slot": "slot",
+    "speed": "speed",
+    "attackrange": "attackrange",
+    "combatstyle": "combatstyle",
+}
+# Parameters Infobox Item is authoritative for; Infobox Bonuses wins for everything else
+# (its image1, image2, ... are the equipped images, not the inventory icon)
+ITEM_PARAMS = {"id", "image", "version"}
+TEXT_STATS = {"slot", "combatstyle"}
+FLOAT_STATS = {"magic_damage"}
+
+TOKEN_PATTERN = re.compile(r"\{\{|\}\}|\[\[|\]\]|\|")
+VERSIONED_PARAM = re.compile(r"^(.*?)(\d+)$")
+FILE_LINK = re.compile(r"\[\[\s*(File:[^|\]]+?)\s*(?:\||\]\])", re.I)
+INTEGER = re.compile(r"[+-]?\d+")
+NUMBER = re.compile(r"[+-]?\d+(?:\.\d+)?")
+
+
+@functools.lru_cache(maxsize=None)
+def template_start_pattern(names):
+    return re.compile(r"\{\{\s*(" + "|".join(re.escape(name) for name in names) + r")\s*(?=[|}])", re.I)
+
+
+def parse_template(wikitext, start):
+    """Splits the template opening at `start` into its parameters.
+
+    Returns (params, end) where params maps lowercased parameter names to
+    their raw, stripped values and `end` is the offset just past the closing
+    braces. Nested templates and links keep their own `|` separators.
+    """
+    stack = []  # Open constructs: ["{{", [param separators]] or ["[[", None]
+    for token in TOKEN_PATTERN.finditer(wikitext, start):
+        text = token.group()
+        if text == "{{":
+            stack.append(["{{", []])
+        elif text == "[[":
+            stack.append(["[[", None])
+        elif text == "|":
+            if stack[-1][0] == "{{":
+                stack[-1][1].append(token.start())
+        elif text == "]]":
+            if stack[-1][0] == "[[":
+                stack.pop()
+        else:
+            # Unclosed links inside a template don't outlive it
+            while stack[-1][0] == "[[":
+                stack.pop()
+            _, separators = stack.pop()
+            if not stack:
+                params = {}
+                bounds = separators + [token.start()]
+                for left, right in zip(bounds, bounds[1:]):
+                    key, equals, value = wikitext[left + 1:right].partition("=")
+                    if equals:
+                        params[key.strip().lower()] = value.strip()
+                return params, token.end()
+    return {}, len(wikitext)
+
+
+def extract_templates(wikitext, names=INFOBOX_TEMPLATES):
+    """Returns {template name: params} for the first of each wanted template.
+
+    One regex scan finds where the templates start; only their bodies are
+    tokenized, and scanning stops as soon as every wanted template was read.
+    Names are matched case-insensitively and returned lowercased.
+    """
+    found = {}
+    end = 0
+    for match in template_start_pattern(names).finditer(wikitext):
+        name = " ".join(match.group(1).lower().split())
+        if match.start() < end or name in found:
+            continue
+        found[name], end = parse_template(wikitext, match.start())
+        if len(found) == len(names):
+            break
+    return found
+
+
+def parse_stat_value(stat_key, value):
+    """Converts a raw parameter value the same way parse_stat_number did."""
+    if stat_key == "image_name":
+        match = FILE_LINK.search(value)
+        return match.group(1) if match else 0
+    if stat_key in TEXT_STATS:
+        return value or 0
+    match = (NUMBER if stat_key in FLOAT_STATS else INTEGER).search(value)
+    if not match:
+        return 0
+    return float(match.group()) if stat_key in FLOAT_STATS else int(match.group())
+
+
+def extract_item_versions(wikitext):
+    """Returns [(version name or None, stats), ...], one entry per infobox version.
+
+    Missing stats are 0, matching the old regex parser. Pages without a switch
+    infobox yield a single entry with version None. A parameter is looked up
+    versioned, then unversioned, in the template that owns it (ITEM_PARAMS in
+    Infobox Item, the rest in Infobox Bonuses) before falling back to the other
+    one.
+    """
+    templates = extract_templates(wikitext)
+    item, bonuses = (templates.get(name, {}) for name in INFOBOX_TEMPLATES)
+
+    version_numbers = set()
+    for key in list(item) + list(bonuses):
+        match = VERSIONED_PARAM.match(key)
+        if match and (match.group(1) in STAT_PARAMS or match.group(1) == "version"):
+            version_numbers.add(int(match.group(2)))
+
+    def lookup(param, suffix):
+        for params in ((item, bonuses) if param in ITEM_PARAMS else (bonuses, item)):
+            value = params.get(f"{param}{suffix}", params.get(param))
+            if value is not None:
+                return value
+        return None
+
+    versions = []
+    for number in sorted(version_numbers) or [None]:
+        suffix = "" if number is None else str(number)
+        stats = {}
+        for param, stat_key in STAT_PARAMS.items():
+            value = lookup(param, suffix)
+            stats[stat_key] = 0 if value is None else parse_stat_value(stat_key, value)
+        version = lookup("version", suffix) if number is not None else None
+        versions.append((suffix if number is not None and version is None else version, stats))
+    return versions
@@ -0,0 +1,268 @@
+"""Local icon mirror and sprite sheets for the item icons.
+
+Every item record points at its own icon on the wiki CDN. This stage
+downloads each distinct icon URL once into a content-addressed mirror
+(`<sha256>.png`, so identical icons behind different URLs are stored and
+packed once), revalidates them on later runs with If-None-Match /
+If-Modified-Since, and shelf-packs the distinct icons into a few sprite
+sheets. The coordinate map is keyed by item id:
+
+    {
+        "sheets": ["item_sprites/sheet_0.3fa9c1e2b4d0.png", ...],
+        "items": {"4151": [sheet index, x, y, width, height], ...}
+    }
+
+Sheet names carry a hash of their content, so they can be cached forever and
+a map never points at a sheet that changed under it. The sheets of the
+previous map are kept for clients that still have it; older ones are
+deleted.
+
+Run by the item scraper with --sprites, or on its own against the current
+weapons_armor_with_stats.json.
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from PIL import Image
+
+from run_metrics import RunMetrics
+from wiki_client import RequestBudgetExceeded, WikiClient, add_client_arguments
+
+ITEMS_FILE = "../frontend/public/weapons_armor_with_stats.json"
+SPRITE_MAP_FILE = "../frontend/public/item_sprites.json"
+SHEET_DIR = "../frontend/public/item_sprites"
+SHEET_URL_PREFIX = "item_sprites/"  # Sheet paths in the map are relative to frontend/public
+MIRROR_DIR = ".cache/icons"
+MIRROR_INDEX = "index.json"
+REPORT_FILE = "sprites_run_report.json"
+SHEET_WIDTH = 1024
+MAX_SHEET_HEIGHT = 1024
+PADDING = 1  # Transparent gap so neighbouring icons don't bleed when scaled
+CONTENT_HASH_LENGTH = 12
+DEFAULT_WORKERS = 4
+REQUESTS_PER_SECOND = 5.0
+
+SHEET_FILE_PATTERN = re.compile(r"^sheet_\d+(\.[0-9a-f]+)?\.png$")  # Also the unhashed names of older runs
+
+
+def load_mirror_index(mirror_dir):
+    try:
+        with open(os.path.join(mirror_dir, MIRROR_INDEX), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (IOError, json.JSONDecodeError) as e:
+        print(f"Could not read the icon mirror index, revalidating everything: {e}")
+        return {}
+
+
+def save_mirror_index(mirror_dir, index):
+    path = os.path.join(mirror_dir, MIRROR_INDEX)
+    with open(f"{path}.part", "w") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(f"{path}.part", path)
+
+
+def mirror_icon(client, mirror_dir, url, entry):
+    """Downloads one icon unless the mirrored copy is still current.
+
+    Returns (status, entry) where status is "new", "changed" or "unchanged"
+    and entry is the url's updated index entry.
+    """
+    headers = {}
+    if entry and os.path.exists(os.path.join(mirror_dir, f"{entry['sha256']}.png")):
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    with client.metrics.phase("download"):
+        response = client.fetch(url, headers=headers)
+    if response.status_code == 304:
+        return "unchanged", entry
+
+    sha256 = hashlib.sha256(response.content).hexdigest()
+    path = os.path.join(mirror_dir, f"{sha256}.png")
+    if not os.path.exists(path):
+        # Different URLs can serve the same bytes, so each download gets its own temporary file
+        with tempfile.NamedTemporaryFile(dir=mirror_dir, suffix=".part", delete=False) as f:
+            f.write(response.content)
+        try:
+            os.replace(f.name, path)  # Same content either way if another worker got there first
+        except OSError:
+            os.remove(f.name)
+            if not os.path.exists(path):
+                raise
+    new_entry = {
+        "sha256": sha256,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    if entry is None:
+        return "new", new_entry
+    return ("unchanged" if entry["sha256"] == sha256 else "changed"), new_entry
+
+
+def mirror_icons(client, urls, mirror_dir=MIRROR_DIR, workers=DEFAULT_WORKERS):
+    """Brings the mirror up to date for `urls` and returns {url: sha256} for every icon available."""
+    os.makedirs(mirror_dir, exist_ok=True)
+    index = load_mirror_index(mirror_dir)
+    counts = {"new": 0, "changed": 0, "unchanged": 0, "failed": 0}
+
+    def mirror(url):
+        try:
+            return mirror_icon(client, mirror_dir, url, index.get(url))
+        except RequestBudgetExceeded:
+            raise
+        except (requests.exceptions.RequestException, IOError) as e:
+            print(f"  Could not mirror {url}: {e}")
+            return "failed", index.get(url)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for url, (status, entry) in zip(urls, executor.map(mirror, urls)):
+                counts[status] += 1
+                if entry is not None:
+                    index[url] = entry
+    finally:
+        # Keep what was downloaded, even when the run is cut short
+        save_mirror_index(mirror_dir, index)
+
+    print(
+        f"Icons: {counts['new']} new, {counts['changed']} changed, {counts['unchanged']} unchanged, "
+        f"{counts['failed']} failed ({len({entry['sha256'] for entry in index.values()})} distinct images mirrored)"
+    )
+    client.metrics.count_skip("icon download failed", counts["failed"])
+    return {
+        url: index[url]["sha256"] for url in urls
+        if url in index and os.path.exists(os.path.join(mirror_dir, f"{index[url]['sha256']}.png"))
+    }
+
+
+def shelf_pack(sizes, sheet_width=SHEET_WIDTH, max_sheet_height=MAX_SHEET_HEIGHT, padding=PADDING):
+    """Places rectangles on shelves, tallest first, opening a new sheet when one is full.
+
+    `sizes` maps a key to (width, height). Returns ({key: (sheet, x, y)},
+    [(width, height) of each sheet]).
+    """
+    placements = {}
+    sheets = []
+    sheet = x = y = shelf_height = 0
+    for key, (width, height) in sorted(sizes.items(), key=lambda item: (-item[1][1], -item[1][0], item[0])):
+        if x + width > sheet_width:
+            x, y, shelf_height = 0, y + shelf_height + padding, 0
+        if y + height > max_sheet_height and (x or y):
+            sheets.append((sheet_width, y + shelf_height))
+            sheet, x, y, shelf_height = sheet + 1, 0, 0, 0
+        placements[key] = (sheet, x, y)
+        x += width + padding
+        shelf_height = max(shelf_height, height)
+    if placements:
+        sheets.append((sheet_width, y + shelf_height))
+    return placements, sheets
+
+
+def load_map_sheets(map_file):
+    """Sheet file names the current sprite map points at, empty when there is no readable map."""
+    try:
+        with open(map_file, "r") as f:
+            return {path[len(SHEET_URL_PREFIX):] for path in json.load(f)["sheets"]}
+    except (IOError, ValueError, KeyError, TypeError):
+        return set()
+
+
+def build_sprite_sheets(items, client, mirror_dir=MIRROR_DIR, sheet_dir=SHEET_DIR,
+                        map_file=SPRITE_MAP_FILE, workers=DEFAULT_WORKERS):
+    """Mirrors every item icon, packs the distinct ones into sheets and writes the coordinate map."""
+    urls_by_id = {str(item["id"]): item["image_url"] for item in items.values() if item.get("image_url")}
+    urls = sorted(set(urls_by_id.values()))
+    sha_by_url = mirror_icons(client, urls, mirror_dir, workers)
+
+    with client.metrics.phase("pack"):
+        images = {}
+        for sha256 in sorted(set(sha_by_url.values())):
+            try:
+                with Image.open(os.path.join(mirror_dir, f"{sha256}.png")) as image:
+                    images[sha256] = image.convert("RGBA")
+            except (IOError, SyntaxError) as e:
+                print(f"  Skipping unreadable icon {sha256}: {e}")
+                client.metrics.count_skip("unreadable icon")
+        placements, sheet_sizes = shelf_pack({sha256: image.size for sha256, image in images.items()})
+
+    with client.metrics.phase("write sheets"):
+        os.makedirs(sheet_dir, exist_ok=True)
+        sheets = [Image.new("RGBA", size, (0, 0, 0, 0)) for size in sheet_sizes]
+        for sha256, (sheet, x, y) in placements.items():
+            sheets[sheet].paste(images[sha256], (x, y))
+        previous_sheets = load_map_sheets(map_file)
+        sheet_names = []
+        for i, sheet in enumerate(sheets):
+            buffer = io.BytesIO()
+            sheet.save(buffer, format="PNG", optimize=True)
+            body = buffer.getvalue()
+            name = f"sheet_{i}.{hashlib.sha256(body).hexdigest()[:CONTENT_HASH_LENGTH]}.png"
+            path = os.path.join(sheet_dir, name)
+            if not os.path.exists(path):
+                with open(f"{path}.part", "wb") as f:
+                    f.write(body)
+                os.replace(f"{path}.part", path)
+            sheet_names.append(name)
+
+        sprite_map = {"sheets": [SHEET_URL_PREFIX + name for name in sheet_names], "items": {}}
+        for item_id, url in sorted(urls_by_id.items(), key=lambda item: int(item[0])):
+            sha256 = sha_by_url.get(url)
+            if sha256 in placements:
+                sheet, x, y = placements[sha256]
+                sprite_map["items"][item_id] = [sheet, x, y, *images[sha256].size]
+        # The map goes last, so it never points at a sheet that isn't there yet
+        with open(f"{map_file}.part", "w") as f:
+            json.dump(sprite_map, f, separators=(",", ":"))
+        os.replace(f"{map_file}.part", map_file)
+
+        stale = [
+            name for name in os.listdir(sheet_dir)
+            if SHEET_FILE_PATTERN.match(name) and name not in sheet_names and name not in previous_sheets
+        ]
+        for name in stale:
+            os.remove(os.path.join(sheet_dir, name))
+
+    print(
+        f"Packed {len(placements)} distinct icons for {len(sprite_map['items'])} items into "
+        f"{len(sheets)} sheet(s) in {sheet_dir} ({len(stale)} stale removed), map saved to {map_file}"
+    )
+    return sprite_map
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mirror the item icons and pack them into sprite sheets.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Concurrent icon downloads (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND,
+                        help=f"Maximum icon requests per second (default: {REQUESTS_PER_SECOND})")
+    parser.add_argument("--mirror-dir", default=MIRROR_DIR,
+                        help=f"Where downloaded icons are kept between runs (default: {MIRROR_DIR})")
+    add_client_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    metrics = RunMetrics("sprites")
+    client = WikiClient(
+        rate=args.rate,
+        burst=max(1, args.workers),
+        pool_size=max(args.pool_size, args.workers),
+        metrics=metrics,
+        max_requests=args.max_requests,
+    )
+    with open(ITEMS_FILE, "r", encoding="utf-8") as f:
+        build_sprite_sheets(json.load(f), client, mirror_dir=args.mirror_dir, workers=args.workers)
+    client.close()
+    metrics.finish(REPORT_FILE)
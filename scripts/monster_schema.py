@@ -0,0 +1,219 @@
+"""Declared schema for the monster variant properties the scraper keeps.
+
+SMW hands every value back as a string ("Hitpoints": "100", "Poisonous":
+"f"), so every consumer had to parse numbers again on each use. Each kept
+property declares its type here, and normalize_variant coerces a variant's
+values while the scraper runs:
+
+    int     "100" -> 100, "-21" -> -21
+    bool    "t" / "f" -> true / false
+    enum    case-insensitive match on the listed values, stored in their
+            listed spelling ("air" -> "Air")
+    text    kept as a string
+
+Undeclared properties are dropped. Values that don't fit their type are
+dropped too and reported as problems, except `int_or_text` properties, which
+keep free-form values such as Max_hit "38 (melee) <br/> 21 (magic)". Every
+string is interned, so the thousands of repeated attack styles and immunity
+values share one object in memory. NPC_ID stays a string: it is an
+identifier that saved loadouts compare by equality, not a number.
+
+Already normalized values pass through unchanged, so records reused from an
+earlier run can be normalized again.
+
+Run directly to normalize an existing monsters_bosses.json in place, or with
+--measure to compare output size and downstream parse time against the raw
+strings without writing anything.
+"""
+import argparse
+import copy
+import json
+import os
+import re
+import sys
+import time
+
+from combat_math import add_defence_rolls
+
+MONSTERS_FILE = "../frontend/public/monsters_bosses.json"
+MEASURE_REPEATS = 5
+
+INT = "int"
+INT_OR_TEXT = "int_or_text"
+BOOL = "bool"
+ENUM = "enum"
+TEXT = "text"
+
+ELEMENTS = ["Air", "Water", "Earth", "Fire", "None"]
+IMMUNITY = ["Immune", "Not immune"]
+
+# property -> (type, enum values); also the list of properties the scraper keeps
+MONSTER_SCHEMA = {
+    "Attack_bonus": (INT, None),
+    "Attack_level": (INT, None),
+    "Attack_speed": (INT, None),
+    "Attack_style": (TEXT, None),  # Free-form on the wiki ("Magical melee", "Crush, Magic", ...)
+    "Combat_level": (INT, None),
+    "Crush_defence_bonus": (INT, None),
+    "Defence_level": (INT, None),
+    "Elemental_weakness": (ENUM, ELEMENTS),
+    "Elemental_weakness_percent": (INT, None),
+    "Heavy_range_defence_bonus": (INT, None),
+    "Hitpoints": (INT, None),
+    "Image": (TEXT, None),  # "Zulrah_(serpentine).png#6##", the target panel builds the wiki image URL from it
+    "Immune_to_poison": (ENUM, IMMUNITY),
+    "Immune_to_venom": (ENUM, IMMUNITY + ["Poisons"]),
+    "Light_range_defence_bonus": (INT, None),
+    "Magic_Damage_bonus": (INT, None),
+    "Magic_attack_bonus": (INT, None),
+    "Magic_defence_bonus": (INT, None),
+    "Magic_level": (INT, None),
+    "Max_hit": (INT_OR_TEXT, None),
+    "Monster_attribute": (TEXT, None),
+    "NPC_ID": (TEXT, None),
+    "Name": (TEXT, None),
+    "Poisonous": (BOOL, None),
+    "Range_attack_bonus": (INT, None),
+    "Range_defence_bonus": (INT, None),
+    "Ranged_Strength_bonus": (INT, None),
+    "Ranged_level": (INT, None),
+    "Size": (INT, None),
+    "Slash_defence_bonus": (INT, None),
+    "Stab_defence_bonus": (INT, None),
+    "Standard_range_defence_bonus": (INT, None),
+    "Strength_bonus": (INT, None),
+    "Strength_level": (INT, None),
+}
+SCHEMA_BY_LOWER_NAME = {prop.lower(): (prop, spec) for prop, spec in MONSTER_SCHEMA.items()}
+ENUM_LOOKUP = {
+    prop: {value.lower(): sys.intern(value) for value in values}
+    for prop, (kind, values) in MONSTER_SCHEMA.items() if kind == ENUM
+}
+
+INTEGER = re.compile(r"^[+-]?\d+$")
+BOOLEANS = {"t": True, "true": True, "yes": True, "f": False, "false": False, "no": False}
+
+
+class InvalidValue(ValueError):
+    pass
+
+
+def coerce(prop, kind, value):
+    """Returns `value` as the declared type of `prop`, raising InvalidValue when it doesn't fit."""
+    if kind == INT or kind == INT_OR_TEXT:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        text = str(value).strip()
+        if INTEGER.match(text):
+            return int(text)
+        if kind == INT_OR_TEXT and text:
+            return sys.intern(text)
+        raise InvalidValue(value)
+    if kind == BOOL:
+        if isinstance(value, bool):
+            return value
+        try:
+            return BOOLEANS[str(value).strip().lower()]
+        except KeyError:
+            raise InvalidValue(value)
+    if kind == ENUM:
+        try:
+            return ENUM_LOOKUP[prop][str(value).strip().lower()]
+        except KeyError:
+            raise InvalidValue(value)
+    return sys.intern(str(value))
+
+
+def normalize_variant(properties):
+    """Returns (the variant with only declared, coerced properties, [(property, rejected value)])."""
+    variant = {}
+    problems = []
+    for name, value in properties.items():
+        declared = SCHEMA_BY_LOWER_NAME.get(name.lower())
+        if declared is None:
+            continue
+        prop, (kind, _) = declared
+        try:
+            variant[sys.intern(prop)] = coerce(prop, kind, value)
+        except InvalidValue:
+            problems.append((prop, value))
+    return variant, problems
+
+
+def normalize_monster(monster):
+    """Normalizes every variant of a monster record in place, returns (monster, problems)."""
+    problems = []
+    for variant_name, properties in monster["variants"].items():
+        monster["variants"][variant_name], variant_problems = normalize_variant(properties)
+        problems.extend(variant_problems)
+    return monster, problems
+
+
+def measure(raw_monsters):
+    """Prints output size and downstream parse time of the raw records against the normalized ones."""
+    raw_monsters = copy.deepcopy(raw_monsters)
+    for monster in raw_monsters:
+        for variant in monster["variants"].values():
+            variant.pop("Defence_rolls", None)  # Compare like for like, all of them get them added below
+    # Only the undeclared properties dropped, to tell the two savings apart
+    filtered = copy.deepcopy(raw_monsters)
+    for monster in filtered:
+        for variant_name, variant in monster["variants"].items():
+            monster["variants"][variant_name] = {
+                name: value for name, value in variant.items() if name.lower() in SCHEMA_BY_LOWER_NAME
+            }
+    normalized = [normalize_monster(copy.deepcopy(monster))[0] for monster in raw_monsters]
+    versions = (raw_monsters, filtered, normalized)
+
+    def downstream(body):
+        # What a consumer does with the file: decode it, then read the numbers it needs
+        start = time.perf_counter()
+        for monster in json.loads(body):
+            add_defence_rolls(monster)
+        return time.perf_counter() - start
+
+    print(f"{'':<26}{'as scraped':>14}{'filtered':>14}{'normalized':>14}{'change':>10}")
+    rows = []
+    for label, indent in (("bytes, indent=4", 4), ("bytes, compact", None)):
+        sizes = [len(json.dumps(monsters, indent=indent).encode("utf-8")) for monsters in versions]
+        rows.append((label, sizes, "{:,}"))
+    bodies = [json.dumps(monsters) for monsters in versions]
+    # Interleaved, so a cold first pass or a busy moment doesn't land on one version only
+    rounds = [[downstream(body) for body in bodies] for _ in range(MEASURE_REPEATS)]
+    times = [min(column) * 1000 for column in zip(*rounds)]
+    rows.append(("decode + defence rolls ms", times, "{:,.1f}"))
+    for label, values, template in rows:
+        print(
+            f"{label:<26}" + "".join(f"{template.format(value):>14}" for value in values)
+            + f"{(values[2] - values[0]) / values[0]:>+10.1%}"
+        )
+    print("Filtered: undeclared properties dropped, values still strings. Change is normalized against as scraped.")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Normalize monster records to the declared property schema.")
+    parser.add_argument("--input", default=MONSTERS_FILE, help=f"Monster data (default: {MONSTERS_FILE})")
+    parser.add_argument("--measure", action="store_true",
+                        help="Compare size and parse time against the raw strings instead of rewriting the file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with open(args.input, "r") as f:
+        monsters = json.load(f)
+    if args.measure:
+        measure(monsters)
+        sys.exit(0)
+
+    problem_count = 0
+    for monster in monsters:
+        _, problems = normalize_monster(monster)
+        add_defence_rolls(monster)
+        for prop, value in problems:
+            print(f"  {monster['name']}: dropped {prop} {value!r}")
+        problem_count += len(problems)
+    with open(f"{args.input}.part", "w") as f:
+        json.dump(monsters, f, indent=4)
+    os.replace(f"{args.input}.part", args.input)
+    print(f"Normalized {len(monsters)} monsters in {args.input}, {problem_count} invalid values dropped")
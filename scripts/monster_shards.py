@@ -0,0 +1,141 @@
+"""Small monster index plus hash-sharded detail files for the target picker.
+
+monsters_bosses.json has to be downloaded and parsed whole before the picker
+can be used. This stage splits it into an index that is enough to list and
+select monsters, and detail shards holding the full variant stats:
+
+    monsters_index.json
+    {
+        "shards": ["monster_shards/shard_00.3fa9c1e2b4d0.json", ...],
+        "monsters": [
+            {"name": "Zulrah", "shard": 7, "variants": {"Serpentine": {"NPC_ID": "2042", "Combat_level": 725}, ...}},
+            ...
+        ]
+    }
+
+    monster_shards/shard_07.3fa9c1e2b4d0.json
+    {"Zulrah": {"name": "Zulrah", "variants": {...}}, ...}
+
+A monster's shard is crc32(name) % shard count, so it only moves when the
+shard count changes. Shard filenames carry a hash of their content and can be
+cached forever; only the index has to be revalidated (firebase.json serves it
+with no-cache). The shards of the previous index are kept, so a client that
+loaded it just before an update can still fetch its shards; older ones are
+deleted.
+
+Written by the monster scraper with --shards, or rebuilt from the current
+monsters_bosses.json (or .ndjson) by running this module directly.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import zlib
+
+MONSTERS_FILE = "../frontend/public/monsters_bosses.json"
+INDEX_FILE = "../frontend/public/monsters_index.json"
+SHARD_DIR = "../frontend/public/monster_shards"
+SHARD_URL_PREFIX = "monster_shards/"  # Shard paths in the index are relative to frontend/public
+DEFAULT_SHARD_COUNT = 32
+CONTENT_HASH_LENGTH = 12
+# Variant fields the picker needs before a shard is loaded (NPC_ID restores the saved loadout)
+INDEX_FIELDS = ["NPC_ID", "Combat_level"]
+
+SHARD_FILE_PATTERN = re.compile(r"^shard_\d+\.[0-9a-f]+\.json$")
+
+
+def shard_for(name, shard_count):
+    return zlib.crc32(name.encode("utf-8")) % shard_count
+
+
+def load_index_shards(index_file):
+    """Shard file names the current index points at, empty when there is no readable index."""
+    try:
+        with open(index_file, "r") as f:
+            return {path[len(SHARD_URL_PREFIX):] for path in json.load(f)["shards"]}
+    except (IOError, ValueError, KeyError, TypeError):
+        return set()
+
+
+def load_monsters(filename=MONSTERS_FILE):
+    """Reads a JSON array of monsters, or one monster per line for .ndjson files."""
+    with open(filename, "r") as f:
+        if filename.endswith(".ndjson"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+def build_monster_shards(monsters, shard_count=DEFAULT_SHARD_COUNT):
+    """Returns (index entries in input order, [{name: monster} per shard])."""
+    shards = [{} for _ in range(shard_count)]
+    entries = []
+    for monster in monsters:
+        shard = shard_for(monster["name"], shard_count)
+        shards[shard][monster["name"]] = monster
+        entries.append({
+            "name": monster["name"],
+            "shard": shard,
+            "variants": {
+                variant: {field: stats[field] for field in INDEX_FIELDS if field in stats}
+                for variant, stats in monster["variants"].items()
+            },
+        })
+    return entries, shards
+
+
+def save_monster_shards(monsters, index_file=INDEX_FILE, shard_dir=SHARD_DIR, shard_count=DEFAULT_SHARD_COUNT):
+    entries, shards = build_monster_shards(monsters, shard_count)
+    previous_shards = load_index_shards(index_file)
+    try:
+        os.makedirs(shard_dir, exist_ok=True)
+        shard_names = []
+        for i, shard in enumerate(shards):
+            body = json.dumps(shard, sort_keys=True, separators=(",", ":")).encode("utf-8")
+            name = f"shard_{i:02d}.{hashlib.sha256(body).hexdigest()[:CONTENT_HASH_LENGTH]}.json"
+            path = os.path.join(shard_dir, name)
+            # Same name, same content: a shard that didn't change is left alone
+            if not os.path.exists(path):
+                with open(f"{path}.part", "wb") as f:
+                    f.write(body)
+                os.replace(f"{path}.part", path)
+            shard_names.append(name)
+
+        # The index goes last, so it never points at a shard that isn't there yet
+        with open(f"{index_file}.part", "w") as f:
+            json.dump(
+                {"shards": [SHARD_URL_PREFIX + name for name in shard_names], "monsters": entries},
+                f, separators=(",", ":"),
+            )
+        os.replace(f"{index_file}.part", index_file)
+
+        stale = [
+            name for name in os.listdir(shard_dir)
+            if SHARD_FILE_PATTERN.match(name) and name not in shard_names and name not in previous_shards
+        ]
+        for name in stale:
+            os.remove(os.path.join(shard_dir, name))
+    except IOError as e:
+        print(f"Error writing monster shards to {shard_dir}: {e}")
+        return
+
+    sizes = [os.path.getsize(os.path.join(shard_dir, name)) for name in shard_names]
+    print(
+        f"Index of {len(entries)} monsters saved to {index_file} ({os.path.getsize(index_file) / 1024:.0f} KB), "
+        f"{shard_count} shards in {shard_dir} ({min(sizes) / 1024:.0f}-{max(sizes) / 1024:.0f} KB each, "
+        f"{len(stale)} stale removed)"
+    )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Split the monster data into an index and hash-sharded detail files.")
+    parser.add_argument("--input", default=MONSTERS_FILE,
+                        help=f"Monster data to shard, a JSON array or .ndjson (default: {MONSTERS_FILE})")
+    parser.add_argument("--shards", type=int, default=DEFAULT_SHARD_COUNT,
+                        help=f"Number of detail shards (default: {DEFAULT_SHARD_COUNT})")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    save_monster_shards(load_monsters(args.input), shard_count=args.shards)
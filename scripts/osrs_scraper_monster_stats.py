@@ -1,62 +1,122 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 import requests
 import mwparserfromhell
-import json
 
-API_ENDPOINT = "https://oldschool.runescape.wiki/api.php"
+import monster_shards
+from combat_math import add_defence_rolls, hit_chance_table
+from monster_schema import MONSTER_SCHEMA, normalize_monster
+from response_cache import CacheMiss, add_cache_arguments, cache_from_args
+from run_metrics import RunMetrics, add_metrics_arguments, metrics_from_args, profile_file_for
+from wiki_client import API_ENDPOINT, RequestBudgetExceeded, WikiClient, add_client_arguments
+
 PAGE_TITLE = "Zulrah"
 INFOBOX_MONSTER = "Infobox Monster"
 VERSION = "version"
 OUTPUT_FILE = "../frontend/public/monsters_bosses.json"
-FILTERED_BOSS_PROPERTIES = ['Attack_bonus','Attack_level','Attack_speed','Attack_style','Combat_level',
-                            'Crush_defence_bonus','Defence_level','Elemental_weakness','Elemental_weakness_percent',
-                            'Heavy_range_defence_bonus','Hitpoints','Immune_to_poison','Immune_to_venom',
-                            'Light_range_defence_bonus','Magic_Damage_bonus','Magic_attack_bonus',
-                            'Magic_defence_bonus','Magic_level','Max_hit','Monster_attribute','NPC_ID','Name',
-                            'Poisonous','Range_attack_bonus','Range_defence_bonus','Ranged_Strength_bonus',
-                            'Ranged_level','Size','Slash_defence_bonus','Stab_defence_bonus',
-                            'Standard_range_defence_bonus','Strength_bonus','Strength_level']
+NDJSON_OUTPUT_FILE = "../frontend/public/monsters_bosses.ndjson"
+HIT_CHANCE_FILE = "../frontend/public/monster_hit_chances.json"
+REPORT_FILE = "monsters_run_report.json"
+FILTERED_BOSS_PROPERTIES = list(MONSTER_SCHEMA)  # Declared with their types in monster_schema.py
+FILTERED_BOSS_PROPERTIES_LOWER = {prop.lower() for prop in FILTERED_BOSS_PROPERTIES}
+NO_VARIANT = 'No variant'
+
+# --- Bulk mode (--bulk) ---
+# Every monster infobox version is an SMW subobject ("Page#Version") carrying the stats,
+# unversioned infoboxes store them on the page itself
+BULK_QUERY_CONDITIONS = "[[Hitpoints::+]]"
+ASK_LIMIT = 500
+
+# --- Fetch engine ---
+DEFAULT_WORKERS = 4
+REQUESTS_PER_SECOND = 3.0  # Shared across all workers, keep it polite
+BURST_SIZE = 3
+# mwparserfromhell is pure CPU work, so it runs in its own processes while the threads keep fetching
+DEFAULT_PARSE_WORKERS = 2
+PIPELINE_DEPTH = 2  # Pages in flight per worker, thread or process, ahead of the output
+
+
+response_cache = None  # Set from the --cache/--offline flags
+metrics = RunMetrics("monsters")  # Replaced from the --report/--profile-parse flags
+client = WikiClient(API_ENDPOINT, rate=REQUESTS_PER_SECOND, burst=BURST_SIZE, metrics=metrics)  # Rebuilt from the flags
 
 def fetch_page_wikitext(page_title):
+    """Fetches, parses and builds one monster, all on the calling thread."""
+    def fetch():
+        page = fetch_wikitext(page_title)
+        if page is None:
+            return None
+        with metrics.parse_profile(), metrics.phase("parse"):
+            subobjects = parse_variant_names(page['wikitext']['*'])
+        return build_monster(page_title, page, subobjects)
+
+    return skip_page_on_error(page_title, fetch)
+
+def skip_page_on_error(page_title, step, *args):
+    """Runs one step of a page fetch, turning request and unexpected errors into a skipped page (None)."""
+    try:
+        return step(*args)
+    except RequestBudgetExceeded:
+        raise
+    except requests.exceptions.RequestException as e:
+        print(f"Failed to fetch wikitext for {page_title}: {e}")
+        metrics.count_skip("request failed")
+        return None
+    except Exception as e:
+        print(f"An unexpected error occurred during fetch of {page_title}: {e}")
+        metrics.count_skip("unexpected error")
+        return None
+
+def fetch_wikitext(page_title):
+    """Returns the parse API result of a page (wikitext and revid), or None."""
     params_fetch = {
         "action": "parse",
         "page": page_title,
-        "prop": "wikitext",
+        "prop": "wikitext|revid",
         "format": "json",
         "formatVERSION": "2"
     }
-    try:
-        response = requests.get(API_ENDPOINT, params=params_fetch, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-
-        if "parse" in data and "wikitext" in data["parse"]:
-            wikitext = data['parse']['wikitext']['*']
-            wikicode = mwparserfromhell.parse(wikitext)
-            subobjects = parse_subject_for_subobjects(wikicode)
-            
-            subobject_results = {} # Collect data for all subobjects
-            for subobject in subobjects:
-                results = fetch_data_by_subject(page_title, subobject)
-                if subobject == '':
-                    subobject = 'No variant'
-                subobject_results[subobject] = results
-                
-            boss = {}
-            boss['name'] = page_title
-            boss['variants'] = subobject_results
-            
-        else:
-            print("Error: Could not extract wikitext from API response.")
-            print(json.dumps(data, indent=2))
-            exit()
+    with metrics.phase("wikitext fetch"):
+        data = client.get(params_fetch)
 
-    except requests.exceptions.RequestException as e:
-        print(f"Failed to fetch wikitext for {page_title}: {e}")
-        exit()
-    except Exception as e:
-        print(f"An unexpected error occurred during fetch: {e}")
-        exit()
+    if "parse" in data and "wikitext" in data["parse"]:
+        return data['parse']
+    print(f"Error: Could not extract wikitext for {page_title} from API response.")
+    print(json.dumps(data, indent=2))
+    metrics.count_skip("no wikitext")
+    return None
+
+def parse_variant_names(wikitext):
+    """The infobox versions of a page ([''] when it has none)."""
+    return parse_subject_for_subobjects(mwparserfromhell.parse(wikitext))
+
+def timed_parse_variant_names(wikitext):
+    """parse_variant_names for the parse worker processes, which can't reach the run metrics."""
+    start = time.perf_counter()
+    subobjects = parse_variant_names(wikitext)
+    return subobjects, time.perf_counter() - start
 
+def build_monster(page_title, page, subobjects):
+    """Fetches the stats of every variant and assembles the monster record."""
+    subobject_results = {} # Collect data for all subobjects
+    for subobject in subobjects:
+        results = fetch_data_by_subject(page_title, subobject)
+        if subobject == '':
+            subobject = NO_VARIANT
+        subobject_results[subobject] = results
+
+    boss = {}
+    boss['name'] = page_title
+    boss['lastrevid'] = page.get('revid')
+    boss['variants'] = subobject_results
     return boss
 
 def parse_subject_for_subobjects(wikitext):
@@ -81,100 +141,410 @@ def parse_subject_for_subobjects(wikitext):
     return subobjects
 
 def fetch_data_by_subject(subject, subobject):
+    # Errors propagate to fetch_page_wikitext so a failed variant drops the whole page
     subject_data = {}
-    try:
-        params_string = "{\"subject\":\"" + subject + "\",\"subobject\":\"" + subobject.replace(" ", "_") + "\",\"ns\":0}"
-        params_fetch = {
-            "action": "smwbrowse",
-            "browse": "subject",
-            "params": params_string,
+    params_string = "{\"subject\":\"" + subject + "\",\"subobject\":\"" + subobject.replace(" ", "_") + "\",\"ns\":0}"
+    params_fetch = {
+        "action": "smwbrowse",
+        "browse": "subject",
+        "params": params_string,
+        "format": "json",
+        "formatVERSION": "2"
+    }
+    with metrics.phase("smw browse"):
+        data_array = client.get(params_fetch)['query']['data']
+
+    for item in data_array:
+        property_name = item.get("property")
+        if property_name is not None and property_name.lower() in FILTERED_BOSS_PROPERTIES_LOWER:
+            subject_data[property_name] = item.get("dataitem")[0].get("item")
+
+    return subject_data
+
+def smw_value_string(value):
+    """Formats an ask printout value the way smwbrowse reports the same dataitem."""
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, dict):
+        if 'fulltext' in value:
+            # Page values: smwbrowse gives "DB_key#namespace##", without the "File:" style prefix ask includes
+            namespace = value.get('namespace', 0)
+            title = value['fulltext'].split(':', 1)[1] if namespace != 0 and ':' in value['fulltext'] else value['fulltext']
+            return f"{title.replace(' ', '_')}#{namespace}##"
+        if 'value' in value:
+            return smw_value_string(value['value'])
+        if 'raw' in value:
+            return value['raw']
+    return str(value)
+
+def ask_query(conditions, printouts, limit=ASK_LIMIT):
+    """Yields (subject, {property: value}) for every result of an SMW ask query.
+
+    Pages through the results with the query-continue-offset the API returns.
+    Only the first value of each property is kept, as fetch_data_by_subject does.
+    """
+    offset = 0
+    while True:
+        query = "|".join(
+            [conditions] + [f"?{prop}={prop}" for prop in printouts] + [f"limit={limit}", f"offset={offset}"]
+        )
+        params = {
+            "action": "ask",
+            "query": query,
             "format": "json",
-            "formatVERSION": "2"
+            "formatversion": "2"
         }
-        response = requests.get(API_ENDPOINT, params=params_fetch, timeout=30)
-        response.raise_for_status()
-        data_array = response.json()['query']['data']
-        
-        for item in data_array:
-            property_name = item.get("property")
-            if property_name is not None and property_name.lower() in FILTERED_BOSS_PROPERTIES.lower():
-                subject_data[property_name] = item.get("dataitem")[0].get("item")
+        with metrics.phase("bulk ask"):
+            data = client.get(params)
+        if "error" in data:
+            raise RuntimeError(f"SMW ask query failed: {data['error'].get('info', data['error'])}")
 
-    except requests.exceptions.RequestException as e:
-        print(f"Failed to fetch wikitext for {subject}: {e}")
-        exit()
-    except Exception as e:
-        print(f"An unexpected error occurred during fetch: {e}")
-        exit()
+        results = data.get("query", {}).get("results", {})
+        for result in (results.values() if isinstance(results, dict) else results):
+            properties = {}
+            for prop, values in result.get("printouts", {}).items():
+                if values:
+                    properties[prop] = smw_value_string(values[0])
+            yield result["fulltext"], properties
 
-    return subject_data
+        offset = data.get("query-continue-offset")
+        if not offset:
+            break
 
-def save_data_to_json(data, filename):
+def fetch_bulk_variants(page_titles):
+    """Fetches the filtered properties of every monster variant with a few ask queries.
+
+    Returns {page title: {variant name: properties}} for the requested pages.
+    Subjects "Page#Version" become the variants of Page; a page without any
+    such subobject gets its own properties as NO_VARIANT, like the
+    per-variant smwbrowse path.
+    """
+    wanted = set(page_titles)
+    subobjects = {}
+    pages = {}
+    rows = 0
+    for subject, properties in ask_query(BULK_QUERY_CONDITIONS, FILTERED_BOSS_PROPERTIES):
+        rows += 1
+        page_title, _, subobject = subject.partition('#')
+        if page_title not in wanted:
+            continue
+        if subobject:
+            subobjects.setdefault(page_title, {})[subobject.replace('_', ' ')] = properties
+        else:
+            pages[page_title] = {NO_VARIANT: properties}
+    print(f"Bulk query returned {rows} subjects for {len(set(subobjects) | set(pages))} monster pages")
+    return {**pages, **subobjects}
+
+def save_data_to_json(data, filename, indent=4):
     try:
         with open(filename, "w") as f:
-            json.dump(data, f, indent=4)
+            json.dump(data, f, indent=indent)
         print(f"Data successfully saved to {filename}")
     except Exception as e:
         print(f"Error saving data to JSON file: {e}")
 
+def write_json_stream(records, filename, ndjson=False):
+    """Writes records to `filename` one at a time as they are yielded.
+
+    The array form is byte-for-byte what json.dump(list, indent=4) produces;
+    with `ndjson` every record is one compact line instead. Output goes to
+    `filename.part` and is flushed after each record, so a crash leaves
+    everything written so far on disk, and is renamed over `filename` once
+    the stream is exhausted.
+    """
+    part_filename = f"{filename}.part"
+    count = 0
+    try:
+        with open(part_filename, "w") as f:
+            if not ndjson:
+                f.write("[")
+            for record in records:
+                with metrics.phase("write output"):
+                    if ndjson:
+                        f.write(json.dumps(record) + "\n")
+                    else:
+                        body = json.dumps(record, indent=4).replace("\n", "\n    ")
+                        f.write(("," if count else "") + "\n    " + body)
+                    f.flush()
+                count += 1
+            if not ndjson:
+                f.write("\n]" if count else "]")
+        os.replace(part_filename, filename)
+        print(f"{count} records successfully streamed to {filename}")
+    except Exception as e:
+        print(f"Error streaming data to {part_filename} after {count} records: {e}")
+        raise
+    return count
+
+def ordered_map(fn, items, workers):
+    """Yields (item, fn(item)) in input order from a thread pool.
+
+    Unlike executor.map, at most 2 * workers calls are submitted ahead of the
+    consumer, so finished results never pile up in memory.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for item in items:
+            pending.append((item, executor.submit(fn, item)))
+            if len(pending) >= workers * 2:
+                item, future = pending.popleft()
+                yield item, future.result()
+        while pending:
+            item, future = pending.popleft()
+            yield item, future.result()
+
+def pipelined_pages(page_titles, workers, parse_workers, reused=None):
+    """Yields (page_title, monster or None) in title order, parsing in a process pool.
+
+    Fetch threads get the wikitext, `parse_workers` processes run
+    mwparserfromhell on it, and the threads then fetch the variant stats, so
+    a big page is parsed on another core while requests stay in flight. Each
+    stage hands its result to the next from a done callback. At most
+    PIPELINE_DEPTH * (workers + parse_workers) pages are in flight ahead of
+    the consumer, which bounds the parse queue: when the output falls behind,
+    no new pages are fetched. `reused` pages (title -> monster) are passed
+    through without a fetch.
+    """
+    reused = reused or {}
+    # Forking while fetch threads hold locks can deadlock the child, so the parsers are spawned
+    context = multiprocessing.get_context("spawn")
+    with ThreadPoolExecutor(max_workers=workers) as threads, \
+            ProcessPoolExecutor(max_workers=parse_workers, mp_context=context) as parsers:
+
+        def start(page_title):
+            monster = Future()
+
+            def then(future, step):
+                # Feeds the result of one stage into the next, a None result drops the page
+                def done(future):
+                    try:
+                        value = future.result()
+                    except (RequestBudgetExceeded, BrokenProcessPool) as e:
+                        monster.set_exception(e)
+                        return
+                    except Exception as e:
+                        # Fetch errors are handled on the threads, so this one came out of a parser
+                        print(f"An unexpected error occurred during parse of {page_title}: {e}")
+                        metrics.count_skip("unexpected error")
+                        monster.set_result(None)
+                        return
+                    if value is None:
+                        monster.set_result(None)
+                        return
+                    try:
+                        step(value)
+                    except Exception as e:  # The pools shut down because the consumer stopped
+                        monster.set_exception(e)
+                future.add_done_callback(done)
+
+            def parse(page):
+                then(parsers.submit(timed_parse_variant_names, page['wikitext']['*']), lambda parsed: build(page, parsed))
+
+            def build(page, parsed):
+                subobjects, seconds = parsed
+                metrics.add_phase_time("parse", seconds)
+                then(threads.submit(skip_page_on_error, page_title, build_monster, page_title, page, subobjects),
+                     monster.set_result)
+
+            if page_title in reused:
+                metrics.count("reused unchanged pages")
+                monster.set_result(reused[page_title])
+            else:
+                then(threads.submit(skip_page_on_error, page_title, fetch_wikitext, page_title), parse)
+            return monster
+
+        pending = deque()
+        for page_title in page_titles:
+            pending.append((page_title, start(page_title)))
+            if len(pending) >= PIPELINE_DEPTH * (workers + parse_workers):
+                page_title, monster = pending.popleft()
+                yield page_title, monster.result()
+        while pending:
+            page_title, monster = pending.popleft()
+            yield page_title, monster.result()
+
 def get_all_category_members():
-    all_members = []
-    cmcontinue = None
-    params = {
-        "action": "query",
-        "list": "categorymembers",
-        "cmtitle": "Category:Monsters",
-        "cmlimit": "max",
-        "format": "json",
-        "formatversion": "2"
-    }
-    
-    while True:
-        if cmcontinue:
-            params["cmcontinue"] = cmcontinue
+    """Lists Category:Monsters. Failures propagate, so a run never writes an empty output over the last one."""
+    with metrics.phase("category members"):
+        all_members = list(client.category_members("Category:Monsters"))
+    if not all_members:
+        raise RuntimeError("Category:Monsters has no members")
 
-        try:
-            response = requests.get(API_ENDPOINT, params=params)
-            response.raise_for_status()
-            data = response.json()
-
-            for member in data["query"]["categorymembers"]:
-                all_members.append(member["title"])
-
-            cmcontinue = data.get("continue", {}).get("cmcontinue")
-            if not cmcontinue:
-                break
-            
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching category members: {e}")
-            return [], None
-        except Exception as e:
-            print(f"An unexpected error occurred while fetching category members: {e}")
-            return [], None
-    
     print(f"Total members found: {len(all_members)}")
     return all_members
 
-def get_all_monsters_and_bosses():
-    all_data = []
-    all_pages = set()
+def fetch_revision_ids(page_titles):
+    """Looks up the current revision id of each page, 50 titles per request."""
+    revision_ids = {}
+    for i in range(0, len(page_titles), 50):
+        params = {
+            "action": "query",
+            "prop": "info",
+            "titles": "|".join(page_titles[i:i + 50]),
+            "format": "json",
+            "formatversion": "2"
+        }
+        with metrics.phase("revision check"):
+            data = client.get(params, fresh=True)
+        normalized = {n["to"]: n["from"] for n in data["query"].get("normalized", [])}
+        for page in data["query"]["pages"]:
+            if "lastrevid" in page:
+                revision_ids[normalized.get(page["title"], page["title"])] = page["lastrevid"]
+    return revision_ids
+
+def load_previous_data(filename):
+    """Loads the monsters of an earlier run, a JSON array or .ndjson, keyed by page title."""
+    try:
+        return {boss['name']: boss for boss in monster_shards.load_monsters(filename)}
+    except FileNotFoundError:
+        print(f"No previous output at {filename}, doing a full fetch.")
+    except Exception as e:
+        print(f"Could not read previous output {filename}, doing a full fetch: {e}")
+    return {}
+
+def get_all_monsters_and_bosses(workers=DEFAULT_WORKERS, previous_data=None, bulk=False,
+                                parse_workers=DEFAULT_PARSE_WORKERS):
+    """Fetches every monster page into a list. Prefer iter_monsters_and_bosses for full runs."""
+    return list(iter_monsters_and_bosses(workers, previous_data, bulk, parse_workers))
+
+def iter_monsters_and_bosses(workers=DEFAULT_WORKERS, previous_data=None, bulk=False,
+                             parse_workers=DEFAULT_PARSE_WORKERS):
+    """Yields every monster, in title order, as soon as it has been fetched.
+
+    With `previous_data` (monsters from an earlier run, keyed by name), pages
+    whose current revision matches the stored `lastrevid` are reused instead
+    of being fetched and parsed again. With `bulk`, all variants come from
+    paged SMW ask queries instead of one smwbrowse request per variant.
+    With `parse_workers`, wikitext is parsed in that many processes (see
+    pipelined_pages), otherwise on the fetch threads.
+    """
+    fetched = 0
 
     members = get_all_category_members()
-    all_pages.update(members)
+    # Sorted so the output order doesn't depend on set iteration or on which worker finishes first
+    page_titles = sorted(
+        page_title for page_title in set(members)
+        if not (':' in page_title or 'disambiguation' in page_title.lower() or 'redirect' in page_title.lower())
+    )
+    metrics.count_skip("not a monster page", len(set(members)) - len(page_titles))
 
-    for page_title in all_pages:
-        if ':' in page_title or 'disambiguation' in page_title.lower() or 'redirect' in page_title.lower():
-            continue
+    fetch_page = fetch_page_wikitext
+    reused = {}
+    if bulk:
+        variants_by_page = fetch_bulk_variants(page_titles)
+
+        def fetch_page(page_title):
+            if page_title not in variants_by_page:
+                metrics.count_skip("no bulk results")
+                return None
+            return {'name': page_title, 'variants': variants_by_page[page_title]}
+    elif previous_data:
         try:
-            page_data = fetch_page_wikitext(page_title)
-            if page_data:
-                all_data.append(page_data)
-                print(f"Successfully fetched data for {page_title}: {len(all_data)}/{len(all_pages)}")
+            revision_ids = fetch_revision_ids(page_titles)
+        except (requests.exceptions.RequestException, json.JSONDecodeError, CacheMiss) as e:
+            print(f"Could not fetch revision ids, refetching every page: {e}")
+            revision_ids = {}
+        reused = {
+            page_title: previous_data[page_title] for page_title in page_titles
+            if page_title in previous_data
+            and previous_data[page_title].get('lastrevid')
+            and previous_data[page_title]['lastrevid'] == revision_ids.get(page_title)
+        }
+        print(f"{len(reused)} unchanged pages, {len(page_titles) - len(reused)} to refresh")
 
-        except Exception as e:
-            print(f"An error occurred while fetching data for {page_title}: {e}")
-    return all_data
+        def fetch_page(page_title):
+            if page_title in reused:
+                metrics.count("reused unchanged pages")
+                return reused[page_title]
+            return fetch_page_wikitext(page_title)
+
+    if bulk:
+        # Bulk records are already in memory, so there is nothing to hand to the thread pool
+        pages = ((t, fetch_page(t)) for t in page_titles)
+    elif parse_workers and not metrics.profile_parse:
+        pages = pipelined_pages(page_titles, workers, parse_workers, reused)
+    else:
+        # cProfile only sees this process, so --profile-parse keeps parsing on the fetch threads
+        pages = ordered_map(fetch_page, page_titles, workers)
+    for page_title, page_data in pages:
+        if page_data:
+            fetched += 1
+            print(f"Successfully fetched data for {page_title}: {fetched}/{len(page_titles)}")
+            # Typed values from here on; reused records from older runs are normalized again
+            page_data, problems = normalize_monster(page_data)
+            for prop, value in problems:
+                print(f"  {page_title}: dropped {prop} {value!r}, not a valid {MONSTER_SCHEMA[prop][0]}")
+                metrics.count(f"invalid {prop}")
+            # Also fills in records reused from runs that predate Defence_rolls
+            yield add_defence_rolls(page_data)
+        else:
+            print(f"Skipping {page_title}: no data fetched")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape monster and boss stats from the OSRS wiki.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Number of concurrent page fetches (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND,
+                        help=f"Maximum API requests per second across all workers (default: {REQUESTS_PER_SECOND})")
+    parser.add_argument("--parse-workers", type=int, default=DEFAULT_PARSE_WORKERS,
+                        help=f"Processes parsing wikitext alongside the fetch threads, 0 parses on the threads "
+                             f"(default: {DEFAULT_PARSE_WORKERS})")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"Only re-parse pages whose revision changed since the last run of {OUTPUT_FILE} "
+                             f"(or {NDJSON_OUTPUT_FILE} with --ndjson)")
+    parser.add_argument("--ndjson", action="store_true",
+                        help=f"Write one monster per line to {NDJSON_OUTPUT_FILE} instead of a JSON array")
+    parser.add_argument("--hit-chance-table", action="store_true",
+                        help=f"Also write hit chances per attack roll bucket and defence roll to {HIT_CHANCE_FILE}")
+    parser.add_argument("--shards", type=int, nargs="?", const=monster_shards.DEFAULT_SHARD_COUNT, default=None,
+                        help=f"Also write {monster_shards.INDEX_FILE} and this many content-hashed detail shards "
+                             f"(default: {monster_shards.DEFAULT_SHARD_COUNT})")
+    parser.add_argument("--bulk", action="store_true",
+                        help="Fetch all variants with a few paged SMW ask queries instead of one request per variant")
+    add_client_arguments(parser)
+    add_cache_arguments(parser)
+    add_metrics_arguments(parser, REPORT_FILE)
+    args = parser.parse_args()
+    if args.bulk and args.incremental:
+        parser.error("--bulk refetches everything in a few requests, it can't be combined with --incremental")
+    return args
 
 if __name__ == "__main__":
-    all_monsters_bosses_data = get_all_monsters_and_bosses()
-    save_data_to_json(all_monsters_bosses_data, OUTPUT_FILE)
\ No newline at end of file
+    args = parse_args()
+    response_cache = cache_from_args(args)
+    metrics = metrics_from_args(args, "monsters")
+    client = WikiClient(
+        API_ENDPOINT,
+        rate=args.rate,
+        burst=max(1, min(BURST_SIZE, args.workers)),
+        pool_size=max(args.pool_size, args.workers),
+        cache=response_cache,
+        metrics=metrics,
+        max_requests=args.max_requests,
+    )
+    output_file = NDJSON_OUTPUT_FILE if args.ndjson else OUTPUT_FILE
+    previous_data = load_previous_data(output_file) if args.incremental else None
+    monsters = iter_monsters_and_bosses(
+        workers=args.workers, previous_data=previous_data, bulk=args.bulk, parse_workers=args.parse_workers
+    )
+    try:
+        write_json_stream(monsters, output_file, ndjson=args.ndjson)
+    except RequestBudgetExceeded as e:
+        print(f"{e}, stopping. The monsters fetched so far are in the .part file.")
+        metrics.finish(args.report)
+        sys.exit(1)
+    if args.hit_chance_table:
+        # Read back from disk, like the shards below
+        with metrics.phase("hit chance table"):
+            table = hit_chance_table(monster_shards.load_monsters(output_file))
+            save_data_to_json(table, HIT_CHANCE_FILE, indent=None)
+    if args.shards:
+        # Read back from disk, so the fetch itself keeps streaming
+        with metrics.phase("shards"):
+            monster_shards.save_monster_shards(monster_shards.load_monsters(output_file), shard_count=args.shards)
+    client.close()
+    if response_cache is not None:
+        response_cache.close()
+    metrics.finish(args.report, profile_file_for(args.report))
\ No newline at end of file
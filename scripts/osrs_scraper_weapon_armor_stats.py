@@ -1,15 +1,23 @@
+import argparse
 import requests
 import json
-import re
 import time
-import os
 import sys
 
+import item_sprites
+from checkpoint_journal import CheckpointJournal
+from infobox_extractor import extract_item_versions
+from passive_effects import save_passive_effects
+from response_cache import CacheMiss, add_cache_arguments, cache_from_args
+from run_metrics import RunMetrics, add_metrics_arguments, metrics_from_args, profile_file_for
+from wiki_client import API_ENDPOINT, RequestBudgetExceeded, WikiApiError, WikiClient, add_client_arguments
+from search_index import save_search_index
+
 # --- Configuration ---
-API_BASE_URL = "https://oldschool.runescape.wiki/api.php"
 INPUT_FILE = "osrs_all_items.json"
 OUTPUT_FILE = "../frontend/public/weapons_armor_with_stats.json"
-TEMP_OUTPUT_FILE = "../frontend/public/osrs_all_items_with_stats_temp.json"
+JOURNAL_FILE = "../frontend/public/osrs_all_items_with_stats_journal.jsonl"
+REPORT_FILE = "items_run_report.json"
 CATEGORIES_TO_FETCH = [
     "Category:Weapons",
     "Category:Ammunition_slot_items",
@@ -25,34 +33,8 @@ CATEGORIES_TO_FETCH = [
 ]
 REQUEST_DELAY = 0.3
 LIMIT_PER_REQUEST = 500
+BATCH_SIZE = 50  # MediaWiki's multi-title limit for non-bot clients
 
-STAT_PATTERNS = {
-    "id": re.compile(r"id1?\s*=\s*(\d+)", re.I),
-    "image_name": re.compile(
-        r"image1?\s*=\s*\[\[(File:([A-z ()\-'1-9]*)\.png)\]\]", re.I
-    ),
-    # Attack Bonuses
-    "stab_attack": re.compile(r"astab\s*=\s*([+-]?\d+)", re.I),
-    "slash_attack": re.compile(r"aslash\s*=\s*([+-]?\d+)", re.I),
-    "crush_attack": re.compile(r"acrush\s*=\s*([+-]?\d+)", re.I),
-    "magic_attack": re.compile(r"amagic\s*=\s*([+-]?\d+)", re.I),
-    "ranged_attack": re.compile(r"arange\s*=\s*([+-]?\d+)", re.I),
-    # Defence Bonuses
-    "stab_defence": re.compile(r"dstab\s*=\s*([+-]?\d+)", re.I),
-    "slash_defence": re.compile(r"dslash\s*=\s*([+-]?\d+)", re.I),
-    "crush_defence": re.compile(r"dcrush\s*=\s*([+-]?\d+)", re.I),
-    "magic_defence": re.compile(r"dmagic\s*=\s*([+-]?\d+)", re.I),
-    "ranged_defence": re.compile(r"drange\s*=\s*([+-]?\d+)", re.I),
-    # Other Bonuses
-    "melee_strength": re.compile(r"str\s*=\s*([+-]?\d+)", re.I),
-    "ranged_strength": re.compile(r"rstr\s*=\s*([+-]?\d+)", re.I),
-    "magic_damage": re.compile(r"mdmg\s*=\s*([+-]?\d+(?:\.\d+)?%?)", re.I),
-    "prayer": re.compile(r"prayer\s*=\s*([+-]?\d+)", re.I),
-    "slot": re.compile(r"slot\s*=\s*(\w+)", re.I),
-    "speed": re.compile(r"speed\s*=\s*(\d+)", re.I),
-    "attackrange": re.compile(r"attackrange\s*=\s*(\d+|\w+)", re.I),
-    "combatstyle": re.compile(r"combatstyle\s*=\s*(\w+)", re.I),
-}
 COSMETIC_SUFFIXES = [
     "(g)",
     "(t)",
@@ -86,303 +68,485 @@ COSMETIC_KEYWORDS = [
     " ornament kit"
 ]
 
-session = requests.Session()
-session.headers.update(
-    {
-        "User-Agent": "ScapeMateScripts/1.0 (https://github.com/Froztbitten/ScapeMate; devonsphillips36@gmail.com) - Contact me if issues arise"
+response_cache = None  # Set from the --cache/--offline flags
+metrics = RunMetrics("items")  # Replaced from the --report/--profile-parse flags
+client = WikiClient(API_ENDPOINT, metrics=metrics)  # Rebuilt from the command line flags
+requests_at_last_sleep = 0
+journal = None  # CheckpointJournal for the current run
+resumed_records = {}  # Titles already handled by an interrupted run, from the journal
+
+
+def is_cosmetic(title):
+    """Cosmetic variants share their stats with the base item, so they aren't fetched."""
+    lowered = title.lower()
+    return lowered.endswith(tuple(COSMETIC_SUFFIXES)) or any(keyword in lowered for keyword in COSMETIC_KEYWORDS)
+
+
+def get_category_titles(category_title):
+    """Lists the non-cosmetic page titles in a category.
+
+    Failures propagate, so a category that couldn't be listed never drops its
+    items from the output.
+    """
+    with metrics.phase("category members"):
+        members = list(client.category_members(category_title, limit=LIMIT_PER_REQUEST))
+    if not members:
+        print(f"  Category '{category_title}' might be empty or does not exist.", file=sys.stderr)
+    titles = [title for title in members if not is_cosmetic(title)]
+    metrics.count_skip("cosmetic", len(members) - len(titles))
+    return titles
+
+
+def collect_unique_titles(categories):
+    """First phase: enumerates every category and dedupes the titles, keeping first-seen order.
+
+    Also reports how many stats requests the dedupe saves over fetching each
+    category on its own.
+    """
+    titles = {}
+    listed = 0
+    batches_per_category = 0
+    for category in categories:
+        print(f"\nListing members of category: '{category}'")
+        category_titles = get_category_titles(category)
+        print(f"  {len(category_titles)} titles")
+        listed += len(category_titles)
+        batches_per_category += -(-len(category_titles) // BATCH_SIZE)
+        titles.update(dict.fromkeys(category_titles))
+
+    titles = list(titles)
+    # Every batch costs one wikitext request and (about) one image lookup
+    saved_requests = 2 * (batches_per_category - -(-len(titles) // BATCH_SIZE))
+    print(
+        f"\n{listed} titles listed, {len(titles)} unique: {listed - len(titles)} duplicates dropped, "
+        f"saving about {saved_requests} requests"
+    )
+    metrics.count("duplicate titles dropped", listed - len(titles))
+    metrics.count("requests saved by dedupe", saved_requests)
+    return titles
+
+
+def fetch_items(titles, previous_items=None):
+    """Second phase: fetches each title once, BATCH_SIZE titles at a time, keyed by item id."""
+    items = {}
+    for title_batch in chunked(titles, BATCH_SIZE):
+        items.update(process_title_batch(title_batch, previous_items))
+        polite_sleep()
+    return items
+
+
+def polite_sleep():
+    """Waits REQUEST_DELAY, unless everything since the last wait came from the cache."""
+    global requests_at_last_sleep
+    if client.requests_made != requests_at_last_sleep:
+        with metrics.phase("polite sleep"):
+            time.sleep(REQUEST_DELAY)
+        requests_at_last_sleep = client.requests_made
+
+
+def chunked(items, size):
+    """Yields successive lists of at most `size` items."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def query_pages(titles, params, fresh=False):
+    """Runs a multi-title prop query, following continuation.
+
+    Returns the pages keyed by their canonical title and a dict mapping each
+    requested title to its canonical title (after normalization and redirects).
+    Raises WikiApiError when the API answers with an error, so a failed batch
+    is never mistaken for pages that don't exist.
+    """
+    params = {
+        "action": "query",
+        "format": "json",
+        "formatversion": "2",
+        "titles": "|".join(titles),
+        **params,
     }
-)
-
-
-def get_all_category_members(session, category_title):
-    members = {}
-    last_continue = {}
-
-    while True:
-        # Parameters for the API request
-        params = {
-            "action": "query",
-            "format": "json",
-            "list": "categorymembers",
-            "cmtitle": category_title,
-            "cmlimit": LIMIT_PER_REQUEST,
-            **last_continue,  # Add continuation parameters from the previous response
-        }
-
-        try:
-            # Make the API request
-            response = session.get(API_BASE_URL, params=params)
-            response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
-
-            data = response.json()
-
-            # Check for API warnings or errors within the JSON response
-            if "warnings" in data:
-                print(
-                    f"  API Warning for {category_title}: {data['warnings']}",
-                    file=sys.stderr,
-                )
-            if "error" in data:
-                print(
-                    f"  API Error for {category_title}: {data['error']}",
-                    file=sys.stderr,
-                )
-                return {}  # Return empty dictionary on error
-
-            # Extract members from the current batch
-            if "query" in data and "categorymembers" in data["query"]:
-                batch_members = data["query"]["categorymembers"]
-                if not batch_members:
-                    # Handle cases where category might be empty or query fails unexpectedly
-                    print(
-                        f"  No members found in this batch for {category_title}.",
-                        file=sys.stderr,
-                    )
-                    # Check if this was the first request or if continuation was expected
-                    if not last_continue:
-                        print(
-                            f"  Category '{category_title}' might be empty or does not exist.",
-                            file=sys.stderr,
-                        )
-                    break  # Exit loop if no members found
-
-                for member in batch_members:
-                    if not member["title"].lower().endswith(tuple(COSMETIC_SUFFIXES)):
-                        info = fetch_and_parse_item_stats(member.get("title"))
-
-                        stat_sum = 0
-                        for key, value in info.items():
-                            if key not in [
-                                "id",
-                                "image_name",
-                                "slot",
-                                "combatstyle",
-                                "speed",
-                                "attackrange",
-                            ]:
-                                stat_sum += value
-
-                        if stat_sum == 0:
-                            print(
-                                f"  Skipping '{member.get('title')}' due to no stats."
-                            )
-                            continue
-
-                        if not info:
-                            print(
-                                f"  Skipping '{member.get('title')}' due to invalid or missing item info."
-                            )
-                            continue
-
-                        item_id = info.get("id")
-                        if not item_id:
-                            print(
-                                f"  Skipping '{member.get('title')}' due to invalid or missing item id."
-                            )
-                            print(f"  Value:\n  {info}")
-                            continue
-
-                        image_url = fetch_item_image(info.get("image_name"))
-                        if not image_url:
-                            print(
-                                f"  Skipping '{member.get('title')}' due to invalid or missing image."
-                            )
-                            continue
-
-                        del info["id"]
-                        del info["image_name"]
-
-                        members[int(item_id)] = {  # Use item_id as the key
-                            "name": member.get("title"),
-                            "id": item_id,
-                            "image_url": image_url,
-                            "stats": info,
-                        }
-
-                        save_partial_data(members)  # Save after each item
-                        time.sleep(REQUEST_DELAY)
-            else:
-                print(
-                    f"  Unexpected response structure for {category_title}. 'query' or 'categorymembers' missing.",
-                    file=sys.stderr,
-                )
-                print(f"  Response data: {data}", file=sys.stderr)
-                return {}  # Return empty dictionary on unexpected structure
-
-            # Check for continuation
-            if "continue" in data:
-                last_continue = data["continue"]
-                # Be polite, wait before the next request
-                # print(f"    ...continuing fetch for {category_title}") # Optional progress indicator
-                time.sleep(REQUEST_DELAY)
-            else:
-                # No more pages, break the loop
-                break
-
-        except requests.exceptions.RequestException as e:
-            print(
-                f"  Network Error fetching {category_title}: {e}", file=sys.stderr)
-            return {}  # Return empty dictionary on network error
-        except Exception as e:
-            print(
-                f"  An unexpected error occurred for {category_title}: {e}",
-                file=sys.stderr,
-            )
-            return {}  # Return empty dictionary on other errors
-
-    return members
-
-
-def fetch_and_parse_item_stats(item_name):
-    """Fetches the wikitext for an item and parses its combat stats."""
-    print(f"Fetching wikitext for '{item_name}'...")
-
+    pages = {}
+    normalized = {}
+    redirects = {}
+
+    for data in client.query_continue(params, fresh=fresh):
+        if "error" in data:
+            raise WikiApiError(f"API error for batch query: {data['error'].get('info', data['error'])}")
+
+        query = data.get("query", {})
+        normalized.update({n["from"]: n["to"] for n in query.get("normalized", [])})
+        redirects.update({r["from"]: r["to"] for r in query.get("redirects", [])})
+        for page in query.get("pages", []):
+            # Continued responses repeat pages, only with the props that didn't fit before
+            existing = pages.setdefault(page["title"], {})
+            for key, value in page.items():
+                if isinstance(value, list) and key in existing:
+                    existing[key].extend(value)
+                else:
+                    existing.setdefault(key, value)
+
+    title_map = {}
+    for title in titles:
+        canonical = normalized.get(title, title)
+        title_map[title] = redirects.get(canonical, canonical)
+    return pages, title_map
+
+
+def fetch_wikitext_batch(titles):
+    """Fetches the wikitext for up to BATCH_SIZE pages in a single request.
+
+    Returns the wikitext and the revision id it was read from, both keyed by
+    the requested title.
+    """
+    with metrics.phase("wikitext fetch"):
+        pages, title_map = query_pages(
+            titles,
+            {"prop": "revisions", "rvprop": "content|ids", "rvslots": "main"},
+        )
+
+    wikitexts = {}
+    revision_ids = {}
+    for title in titles:
+        page = pages.get(title_map[title], {})
+        if page.get("missing") or not page.get("revisions"):
+            print(f"  No wikitext found for '{title}'.")
+            metrics.count_skip("no wikitext")
+            continue
+        revision = page["revisions"][0]
+        wikitexts[title] = revision["slots"]["main"]["content"]
+        revision_ids[title] = revision.get("revid")
+    return wikitexts, revision_ids
+
+
+def fetch_revision_ids(titles):
+    """Looks up the current revision id of each page, BATCH_SIZE titles per request."""
+    revision_ids = {}
+    for title_batch in chunked(titles, BATCH_SIZE):
+        with metrics.phase("revision check"):
+            pages, title_map = query_pages(title_batch, {"prop": "info"}, fresh=True)
+        for title in title_batch:
+            lastrevid = pages.get(title_map[title], {}).get("lastrevid")
+            if lastrevid:
+                revision_ids[title] = lastrevid
+    return revision_ids
+
+
+def reuse_unchanged_items(titles, previous_items):
+    """Splits a title batch into reusable records and titles that need fetching."""
+    try:
+        revision_ids = fetch_revision_ids(titles)
+    except (requests.exceptions.RequestException, json.JSONDecodeError, CacheMiss, WikiApiError) as e:
+        print(f"  Could not fetch revision ids, refetching batch: {e}")
+        return {}, titles
+
+    reused = {}
+    stale_titles = []
+    for title in titles:
+        previous = previous_items.get(title)
+        if previous and previous[0].get("lastrevid") and previous[0]["lastrevid"] == revision_ids.get(title):
+            for record in previous:
+                reused[int(record["id"])] = record
+            metrics.count("reused unchanged pages")
+        else:
+            stale_titles.append(title)
+    print(f"  {len(reused)} unchanged, {len(stale_titles)} to refresh")
+    return reused, stale_titles
+
+
+def fetch_image_urls_batch(file_titles):
+    """Resolves the URLs for up to BATCH_SIZE File: titles in a single request."""
+    with metrics.phase("image lookup"):
+        pages, title_map = query_pages(
+            file_titles,
+            {"prop": "imageinfo", "iiprop": "url", "redirects": "1"},
+        )
+
+    image_urls = {}
+    for file_title in file_titles:
+        page = pages.get(title_map[file_title], {})
+        if page.get("missing") and not page.get("imageinfo"):
+            print(f"  Item Image '{file_title}' not found in pages.")
+        elif page.get("imageinfo"):
+            image_urls[file_title] = page["imageinfo"][0].get("url")
+        else:
+            print(f"  No image found for item: '{file_title}'")
+    return image_urls
+
+
+def process_title_batch(titles, previous_items=None):
+    """Fetches a batch of titles and records the outcome in the checkpoint journal.
+
+    Titles already in the journal of an interrupted run are taken from it
+    instead of being fetched again.
+    """
+    items = {}
+    titles_to_fetch = []
+    for title in titles:
+        if title in resumed_records:
+            for record in resumed_records[title] or []:
+                items[int(record["id"])] = record
+            metrics.count("resumed from journal")
+        else:
+            titles_to_fetch.append(title)
+
+    if not titles_to_fetch:
+        return items
+
+    new_items = {}
+    if previous_items:
+        reused, titles_to_fetch = reuse_unchanged_items(titles_to_fetch, previous_items)
+        new_items.update(reused)
+    if titles_to_fetch:
+        fetched = fetch_item_batch(titles_to_fetch)
+        if fetched is None:
+            # Failed fetches stay out of the journal so a resumed run retries them
+            titles_to_fetch = []
+        else:
+            new_items.update(fetched)
+
+    if journal is not None:
+        by_title = {}
+        for record in new_items.values():
+            by_title.setdefault(record.get("page", record["name"]), []).append(record)
+        with metrics.phase("journal"):
+            for title in titles:
+                if title in by_title or title in titles_to_fetch:
+                    journal.append(title, by_title.get(title))
+
+    items.update(new_items)
+    return items
+
+
+def fetch_item_batch(titles):
+    """Fetches, parses and resolves images for a batch of item pages.
+
+    Every infobox version with its own id becomes a separate item, named
+    "Title (Version)" with the page title kept under "page". Returns the items
+    keyed by item id, in the same shape as the output file, or None if the
+    batch could not be fetched.
+    """
+    print(f"Fetching wikitext for {len(titles)} items ('{titles[0]}' .. '{titles[-1]}')...")
     try:
-        params = {
-            "action": "parse",
-            "format": "json",
-            "page": item_name,
-            "prop": "wikitext",
-        }
-        response = session.get(API_BASE_URL, params=params)
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-        data = response.json()
+        wikitexts, revision_ids = fetch_wikitext_batch(titles)
     except requests.exceptions.RequestException as e:
-        print(f"  Network error fetching wikitext for '{item_name}': {e}")
+        print(f"  Network error fetching wikitext batch: {e}")
+        metrics.count_skip("wikitext batch failed", len(titles))
         return None
     except json.JSONDecodeError as e:
-        print(
-            f"  Error decoding JSON response for wikitext of '{item_name}': {e}")
+        print(f"  Error decoding JSON response for wikitext batch: {e}")
+        metrics.count_skip("wikitext batch failed", len(titles))
         return None
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
-        import traceback
-
-        traceback.print_exc()
-        return None
-
-    if "error" in data:
-        print(
-            f"  API Error for '{item_name}': {data['error'].get('info', 'Unknown')}")
+    except WikiApiError as e:
+        print(f"  {e}")
+        metrics.count_skip("wikitext batch failed", len(titles))
         return None
-
-    # Extract the wikitext content
-    wikitext = data.get("parse", {}).get("wikitext", {}).get("*")
-
-    if not wikitext:
-        print(f"  No wikitext found for '{item_name}'.")
+    except CacheMiss as e:
+        print(f"  Skipping batch, not in the offline cache: {e}")
+        metrics.count_skip("not in offline cache", len(titles))
         return None
 
-    # Parse the Combat Stats
-    parsed_stats = {}
-    try:
-        for stat_key, pattern in STAT_PATTERNS.items():
-            match = pattern.search(wikitext)
-            # CHECK FOR MATCH HERE
-            if match:
-                if stat_key == "image_name":
-                    parsed_stats[stat_key] = str(match.group(1).strip())
-                elif stat_key in ["slot", "combatstyle"]:
-                    parsed_stats[stat_key] = str(match.group(1).strip())
-                else:
-                    value = parse_stat_number(match, stat_key)
-                    parsed_stats[stat_key] = value
-            else:
-                parsed_stats[stat_key] = 0
-    except re.error as e:
-        print(f"  Regex error processing item '{item_name}': {e}")
-        return None
-    return parsed_stats
-
-
-def parse_stat_number(match, stat_key):
-    if not match:
-        return 0
-    else:
-        value_str = match.group(1).strip()
-        try:
-            cleaned_value = value_str.replace("+", "").replace("%", "").strip()
-            if stat_key != "magic_damage":
-                return int(cleaned_value)
-            else:
-                return float(cleaned_value)
-        except (ValueError, TypeError):
-            return 0
-
-
-def fetch_item_image(item_name):
-    if not item_name:
-        print(f"  No image name provided.")
-        return None
+    parsed = []
+    with metrics.parse_profile(), metrics.phase("parse"):
+        for title in titles:
+            if title not in wikitexts:
+                continue
+            for version, info in parse_item_versions(wikitexts[title]):
+                name = title if version is None else f"{title} ({version})"
+                if is_item_usable(name, info):
+                    parsed.append((title, name, info))
+
+    image_names = list(dict.fromkeys(info["image_name"] for _, _, info in parsed if info.get("image_name")))
+    image_urls = {}
     try:
-        params = {
-            "action": "query",
-            "format": "json",
-            "titles": item_name,
-            "prop": "imageinfo",
-            "iiprop": "url",
-        }
-        response = session.get(API_BASE_URL, params=params)
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-        data = response.json()
-        pages = data.get("query").get("pages")
-        page_key = next(iter(pages.keys()), None)
-
-        if page_key == "-1":
-            print(f"  Item Image '{item_name}' not found in pages.")
-            return None
-
-        if pages[page_key].get("imageinfo"):
-            return pages[page_key].get("imageinfo")[0].get("url")
-        else:
-            print(f"  No image found for item: '{item_name}'")
-            return None
+        for image_batch in chunked(image_names, BATCH_SIZE):
+            image_urls.update(fetch_image_urls_batch(image_batch))
     except requests.exceptions.RequestException as e:
-        print(f"  Network error fetching wikitext for '{item_name}': {e}")
+        print(f"  Network error fetching image batch: {e}")
+        metrics.count_skip("image batch failed", len(titles))
         return None
     except json.JSONDecodeError as e:
-        print(
-            f"  Error decoding JSON response for wikitext of '{item_name}': {e}")
+        print(f"  Error decoding JSON response for image batch: {e}")
+        metrics.count_skip("image batch failed", len(titles))
+        return None
+    except WikiApiError as e:
+        print(f"  {e}")
+        metrics.count_skip("image batch failed", len(titles))
+        return None
+    except CacheMiss as e:
+        print(f"  Skipping batch, not in the offline cache: {e}")
+        metrics.count_skip("not in offline cache", len(titles))
         return None
 
-
-def save_partial_data(data):
-    """Saves the current state of the data to a temporary JSON file."""
+    items = {}
+    for title, name, info in parsed:
+        image_url = image_urls.get(info.get("image_name"))
+        if not image_url:
+            print(f"  Skipping '{name}' due to invalid or missing image.")
+            metrics.count_skip("missing image")
+            continue
+
+        item_id = info.pop("id")
+        del info["image_name"]
+        if int(item_id) in items:
+            metrics.count_skip("duplicate version id")
+            continue  # Versions sharing an id keep the first one
+
+        record = {"name": name}
+        if name != title:
+            record["page"] = title
+        record.update({
+            "id": item_id,
+            "lastrevid": revision_ids.get(title),
+            "image_url": image_url,
+            "stats": info,
+        })
+        items[int(item_id)] = record  # Use item_id as the key
+    return items
+
+
+def is_item_usable(name, info):
+    """Reports and rejects parsed items without stats or an id."""
+    stat_sum = 0
+    for key, value in info.items():
+        if key not in [
+            "id",
+            "image_name",
+            "slot",
+            "combatstyle",
+            "speed",
+            "attackrange",
+        ]:
+            stat_sum += value
+
+    if stat_sum == 0:
+        print(f"  Skipping '{name}' due to no stats.")
+        metrics.count_skip("no stats")
+        return False
+
+    if not info.get("id"):
+        print(f"  Skipping '{name}' due to invalid or missing item id.")
+        print(f"  Value:\n  {info}")
+        metrics.count_skip("missing id")
+        return False
+    return True
+
+
+def parse_item_versions(wikitext):
+    """Parses the combat stats of every infobox version on an item page.
+
+    Returns (name suffix or None, stats) pairs; the suffix is the version name
+    for pages with more than one version.
+    """
+    versions = extract_item_versions(wikitext)
+    if len(versions) == 1:
+        return [(None, versions[0][1])]
+    return versions
+
+
+def load_previous_items(filename):
+    """Loads the records of an earlier run, grouped by page title."""
     try:
-        with open(TEMP_OUTPUT_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-        print(f"  Successfully saved partial data to {TEMP_OUTPUT_FILE}")
-    except IOError as e:
-        print(f"  Error writing partial data to file {TEMP_OUTPUT_FILE}: {e}")
-    except Exception as e:
-        print(f"  An unexpected error occurred during file writing: {e}")
+        with open(filename, "r", encoding="utf-8") as f:
+            items = json.load(f)
+    except FileNotFoundError:
+        print(f"  No previous output at {filename}, doing a full fetch.")
+        return {}
+    except (IOError, json.JSONDecodeError) as e:
+        print(f"  Could not read previous output {filename}, doing a full fetch: {e}")
+        return {}
+    by_page = {}
+    for item in items.values():
+        by_page.setdefault(item.get("page", item["name"]), []).append(item)
+    return by_page
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape weapon and armour stats from the OSRS wiki.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=f"Only re-parse pages whose revision changed since the last run of {OUTPUT_FILE}",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help=f"Discard the checkpoint journal of an interrupted run ({JOURNAL_FILE}) instead of resuming from it",
+    )
+    parser.add_argument(
+        "--sprites",
+        action="store_true",
+        help=f"Also mirror the item icons and pack them into sprite sheets ({item_sprites.SPRITE_MAP_FILE})",
+    )
+    add_client_arguments(parser)
+    add_cache_arguments(parser)
+    add_metrics_arguments(parser, REPORT_FILE)
+    return parser.parse_args()
 
 
 # --- Main Execution ---
 if __name__ == "__main__":
+    args = parse_args()
+    response_cache = cache_from_args(args)
+    metrics = metrics_from_args(args, "items")
+    client = WikiClient(
+        API_ENDPOINT,
+        pool_size=args.pool_size,
+        cache=response_cache,
+        metrics=metrics,
+        max_requests=args.max_requests,
+    )
     print("Starting OSRS Wiki Item Fetcher...")
 
-    all_items = {}  # Changed to a dictionary
+    previous_items = load_previous_items(OUTPUT_FILE) if args.incremental else None
+
+    journal = CheckpointJournal(JOURNAL_FILE)
+    if args.restart:
+        journal.remove()
+    resumed_records = journal.load()
+    if resumed_records:
+        print(f"Resuming from {JOURNAL_FILE}: {len(resumed_records)} titles already processed")
 
-    # Iterate through the specified categories
-    for category in CATEGORIES_TO_FETCH:
-        print(f"\nFetching members for category: '{category}'")
-        category_items = get_all_category_members(session, category)
-        all_items.update(category_items)  # Update the all_items dictionary
+    # List every category first, so items in several categories are fetched only once
+    try:
+        titles = collect_unique_titles(CATEGORIES_TO_FETCH)
+        all_items = fetch_items(titles, previous_items)
+    except RequestBudgetExceeded as e:
+        journal.close()
+        print(f"\n{e}, stopping. Run again to resume from {JOURNAL_FILE}.")
+        metrics.finish(args.report)
+        sys.exit(1)
+    journal.close()
 
     print(f"Total unique items found across all categories: {len(all_items)}")
 
-    # --- Write all data to a single JSON file ---
+    # --- Compact the journal into a single JSON file ---
     print(f"\n\n--- Writing ALL item data to {OUTPUT_FILE} ---")
     try:
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+        with metrics.phase("write output"), open(OUTPUT_FILE, "w", encoding="utf-8") as f:
             # Dump the dictionary
             json.dump(all_items, f, indent=4, ensure_ascii=False)
         print(f"  Successfully saved ALL items data to {OUTPUT_FILE}")
-        if os.path.exists(TEMP_OUTPUT_FILE):
-            os.remove(TEMP_OUTPUT_FILE)
+        journal.remove()
+        with metrics.phase("search index"):
+            save_search_index(all_items)
+        with metrics.phase("passive effects"):
+            save_passive_effects(all_items)
+        if args.sprites:
+            # The icons live on the CDN, not the API, so they get their own rate limit
+            sprite_client = WikiClient(
+                rate=item_sprites.REQUESTS_PER_SECOND,
+                burst=item_sprites.DEFAULT_WORKERS,
+                metrics=metrics,
+                max_requests=args.max_requests,
+            )
+            item_sprites.build_sprite_sheets(all_items, sprite_client)
+            sprite_client.close()
     except IOError as e:
         print(f"  Error writing to file {OUTPUT_FILE}: {e}")
     except Exception as e:
         print(f"  An unexpected error occurred during file writing: {e}")
+    client.close()
+    if response_cache is not None:
+        response_cache.close()
+    metrics.finish(args.report, profile_file_for(args.report))
     print("\nScript finished.")
@@ -0,0 +1,197 @@
+"""Passive effects joined onto the item table by id.
+
+weapons_armor_passive_effects.json is hand-written and keyed by display
+name ("Slayer Helm", "Void Knight Equipment (Melee Set)", ...). This stage
+resolves every entry to the item ids it applies to and writes an id-indexed
+side table next to weapons_armor_with_stats.json, so the frontend looks an
+effect up by id instead of matching names at runtime:
+
+    {
+        "effects": [{"name": ..., "effect": ..., "details": {...}}, ...],
+        "items": {"11864": [0], "11865": [1], ...},   item id -> effect positions
+        "sets": [{"effect": 4, "requires": [[11663], [8839, 13072], ...]}, ...]
+    }
+
+An effect name matches an item by its normalized name, by the name without a
+trailing "(variant)" ("Trident of the seas (e)") and by recolours that end
+in it ("Black slayer helmet"). Each item keeps only its most specific
+matches, so "Slayer helmet (i)" gets the imbued effect and not the plain
+one. Set effects only apply with every piece worn, so they stay out of
+"items": each entry of "requires" is one piece, listing the ids of every
+item that counts as it. Names that don't resolve to any item are reported,
+and a set is left out and reported when any of its pieces doesn't resolve.
+
+Written by the item scraper, or rebuilt by running this module directly.
+"""
+import json
+import re
+
+from search_index import normalize
+
+ITEMS_FILE = "../frontend/public/weapons_armor_with_stats.json"
+EFFECTS_FILE = "../frontend/public/weapons_armor_passive_effects.json"
+PASSIVE_EFFECTS_FILE = "../frontend/public/passive_effects_by_id.json"
+
+BLOCK_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+VARIANT_SUFFIX = re.compile(r"\s*\([^()]*\)$")
+
+# Effects whose name isn't the wiki name of the items they apply to
+EFFECT_ITEM_NAMES = {
+    "Slayer Helm": ["Slayer helmet"],
+    "Slayer Helm (i)": ["Slayer helmet (i)"],
+    "Imbued God Capes (Guthix, Saradomin, Zamorak)": [
+        "Imbued guthix cape", "Imbued saradomin cape", "Imbued zamorak cape",
+    ],
+}
+# Set effects -> the pieces that all have to be worn; a tuple is one piece that any of its items fills
+SET_PIECES = {
+    "Void Knight Equipment (Melee Set)": ["Void melee helm", "Void knight top", "Void knight robe", "Void knight gloves"],
+    "Void Knight Equipment (Ranged Set)": ["Void ranger helm", "Void knight top", "Void knight robe", "Void knight gloves"],
+    "Void Knight Equipment (Magic Set)": ["Void mage helm", "Void knight top", "Void knight robe", "Void knight gloves"],
+    "Void Knight Equipment (Elite Set - Melee/Ranged)": [
+        ("Void melee helm", "Void ranger helm"), "Elite void top", "Elite void robe", "Void knight gloves",
+    ],
+    "Crystal Armour Set (Helm, Body, Legs)": ["Crystal helm", "Crystal body", "Crystal legs"],
+    "Obsidian Armour Set (Helm, Platebody, Platelegs)": ["Obsidian helmet", "Obsidian platebody", "Obsidian platelegs"],
+    "Dharok's Set (Amulet of the Damned worn)": [
+        "Dharok's helm", "Dharok's platebody", "Dharok's platelegs", "Dharok's greataxe", "Amulet of the damned",
+    ],
+    "Guthan's Set (Amulet of the Damned worn)": [
+        "Guthan's helm", "Guthan's platebody", "Guthan's chainskirt", "Guthan's warspear", "Amulet of the damned",
+    ],
+    "Karil's Set (Amulet of the Damned worn)": [
+        "Karil's coif", "Karil's leathertop", "Karil's leatherskirt", "Karil's crossbow", "Amulet of the damned",
+    ],
+    "Torag's Set (Amulet of the Damned worn)": [
+        "Torag's helm", "Torag's platebody", "Torag's platelegs", "Torag's hammers", "Amulet of the damned",
+    ],
+    "Verac's Set (Amulet of the Damned worn)": [
+        "Verac's helm", "Verac's brassard", "Verac's plateskirt", "Verac's flail", "Amulet of the damned",
+    ],
+    "Ahrim's Set (Amulet of the Damned worn)": [
+        "Ahrim's hood", "Ahrim's robetop", "Ahrim's robeskirt", "Ahrim's staff", "Amulet of the damned",
+    ],
+    "Masori Armor (f) Set (Helm, Body, Legs)": ["Masori mask (f)", "Masori body (f)", "Masori chaps (f)"],
+    "Torva Armour Set (Helm, Body, Legs)": ["Torva full helm", "Torva platebody", "Torva platelegs"],
+    "Virtus Robes Set (Mask, Top, Bottom)": ["Virtus mask", "Virtus robe top", "Virtus robe bottom"],
+    "Justiciar Armour Set (Helm, Body, Legs)": ["Justiciar faceguard", "Justiciar chestguard", "Justiciar legguards"],
+    "Inquisitor's Armour Set (Helm, Body, Legs)": [
+        "Inquisitor's great helm", "Inquisitor's hauberk", "Inquisitor's plateskirt",
+    ],
+    "Graceful Outfit Set": [
+        "Graceful hood", "Graceful top", "Graceful legs", "Graceful gloves", "Graceful boots", "Graceful cape",
+    ],
+}
+
+# How an item name matched an effect's item name, most specific first
+EXACT, VARIANT, RECOLOUR, RECOLOUR_VARIANT = range(4)
+
+
+def load_effects(filename=EFFECTS_FILE):
+    """Reads the effects file, which carries /* */ notes that plain JSON doesn't allow."""
+    with open(filename, "r", encoding="utf-8") as f:
+        return json.loads(BLOCK_COMMENT.sub("", f.read()))["items"]
+
+
+def effect_item_names(effect_name):
+    """The wiki item names an effect applies to; "A / B" entries cover both items."""
+    if effect_name in EFFECT_ITEM_NAMES:
+        return EFFECT_ITEM_NAMES[effect_name]
+    return [name.strip() for name in effect_name.split(" / ")]
+
+
+def item_name_keys(name):
+    """Normalized (full name, name without its "(variant)") of an item."""
+    return normalize(name), normalize(VARIANT_SUFFIX.sub("", name))
+
+
+def match_rank(item_keys, target):
+    full, base = item_keys
+    if full == target:
+        return EXACT
+    if base == target:
+        return VARIANT
+    if full.endswith(" " + target):
+        return RECOLOUR
+    if base.endswith(" " + target):
+        return RECOLOUR_VARIANT
+    return None
+
+
+def piece_ids(item_keys, piece):
+    """Ids of every item that counts as a set piece, a name or a tuple of alternative names."""
+    targets = [normalize(name) for name in ((piece,) if isinstance(piece, str) else piece)]
+    return sorted(
+        (item_id for item_id, keys in item_keys.items()
+         if any(match_rank(keys, target) is not None for target in targets)),
+        key=int,
+    )
+
+
+def resolve_effects(items, effects):
+    """Returns ({item id: [effect positions]}, [set entries], [effect item names that matched no item])."""
+    item_keys = {str(item["id"]): item_name_keys(item["name"]) for item in items.values()}
+    best = {}  # item id -> (rank, [effect positions])
+    sets = []
+    unresolved = []
+    for position, effect in enumerate(effects):
+        if effect["name"] in SET_PIECES:
+            pieces = SET_PIECES[effect["name"]]
+            requires = [piece_ids(item_keys, piece) for piece in pieces]
+            missing = [piece for piece, ids in zip(pieces, requires) if not ids]
+            if missing:
+                names = ", ".join(piece if isinstance(piece, str) else " or ".join(piece) for piece in missing)
+                unresolved.append(f"{effect['name']} (missing {names})")
+            else:
+                sets.append({"effect": position, "requires": [[int(item_id) for item_id in ids] for ids in requires]})
+            continue
+        for target_name in effect_item_names(effect["name"]):
+            target = normalize(target_name)
+            matched = False
+            for item_id, keys in item_keys.items():
+                rank = match_rank(keys, target)
+                if rank is None:
+                    continue
+                matched = True
+                current_rank, positions = best.get(item_id, (rank, []))
+                if rank < current_rank:
+                    best[item_id] = (rank, [position])
+                elif rank == current_rank and position not in positions:
+                    best[item_id] = (rank, positions + [position])
+            if not matched:
+                unresolved.append(target_name)
+    by_id = {item_id: best[item_id][1] for item_id in sorted(best, key=int)}
+    return by_id, sets, unresolved
+
+
+def save_passive_effects(items, filename=PASSIVE_EFFECTS_FILE, effects_file=EFFECTS_FILE):
+    try:
+        effects = load_effects(effects_file)
+    except (IOError, json.JSONDecodeError, KeyError) as e:
+        print(f"  Error reading passive effects from {effects_file}: {e}")
+        return
+    by_id, sets, unresolved = resolve_effects(items, effects)
+
+    resolved_effects = {position for positions in by_id.values() for position in positions}
+    resolved_effects.update(entry["effect"] for entry in sets)
+    # Sets with a missing piece are reported below, with the piece
+    unused = [
+        effect["name"] for position, effect in enumerate(effects)
+        if position not in resolved_effects and effect["name"] not in SET_PIECES
+    ]
+    if unused:
+        print(f"  {len(unused)} passive effect(s) apply to no item: {', '.join(unused)}")
+    if unresolved:
+        print(f"  {len(unresolved)} passive effect item name(s) did not resolve: {', '.join(unresolved)}")
+
+    try:
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump({"effects": effects, "items": by_id, "sets": sets}, f, ensure_ascii=False, separators=(",", ":"))
+        print(f"  Successfully saved passive effects for {len(by_id)} items and {len(sets)} sets to {filename}")
+    except IOError as e:
+        print(f"  Error writing passive effects to {filename}: {e}")
+
+
+if __name__ == "__main__":
+    with open(ITEMS_FILE, "r", encoding="utf-8") as f:
+        save_passive_effects(json.load(f))
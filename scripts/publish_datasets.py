@@ -0,0 +1,224 @@
+"""Publishes the scraped datasets under content-hashed names, with deltas.
+
+The scrapers write weapons_armor_with_stats.json and monsters_bosses.json
+under fixed names, so any change means every returning user downloads them
+in full again. This step publishes each dataset as a compact
+`data/<dataset>.<hash>.json`, which never changes and can be cached forever,
+plus per-record deltas from the previous versions, and a manifest that is the
+only file the client has to revalidate:
+
+    data/manifest.json
+    {
+        "datasets": {
+            "items": {
+                "file": "data/items.3fa9c1e2b4d0.json",
+                "hash": "3fa9c1e2b4d0",
+                "key": "id",
+                "records": 1714,
+                "bytes": 1183201,
+                "history": ["3fa9c1e2b4d0", "77b0e1d94c21", ...],   newest first
+                "deltas": {"77b0e1d94c21": "data/items.77b0e1d94c21-3fa9c1e2b4d0.delta.json", ...}
+            },
+            "monsters": {...}
+        }
+    }
+
+    data/items.77b0e1d94c21-3fa9c1e2b4d0.delta.json
+    {"from": "77b0e1d94c21", "to": "3fa9c1e2b4d0", "key": "id",
+     "upsert": {"4151": {...}, ...}, "delete": ["1234", ...]}
+
+A client holding a version listed in "deltas" fetches that delta, replaces or
+adds the "upsert" records and drops the "delete" keys. Items are keyed by
+their id (the key of the items object), monsters by name; monsters are
+published in name order, so a patched list is sorted by name again. Any other
+version downloads "file". Deltas that wouldn't be much smaller than the full
+file are not written. Files no longer referenced by the manifest are deleted.
+
+Run after the scrapers:
+
+    python publish_datasets.py
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+
+PUBLIC_DIR = "../frontend/public"
+DATA_DIR = "../frontend/public/data"  # Paths in the manifest are relative to PUBLIC_DIR
+MANIFEST_FILE = "manifest.json"
+# name -> (source file under PUBLIC_DIR, record key)
+DATASETS = {
+    "items": ("weapons_armor_with_stats.json", "id"),
+    "monsters": ("monsters_bosses.json", "name"),
+}
+CONTENT_HASH_LENGTH = 12
+KEEP_VERSIONS = 5  # Older versions that still get a delta to the newest one
+MAX_DELTA_RATIO = 0.5  # A delta over half the size of the full file isn't worth a separate request
+
+PUBLISHED_FILE_PATTERN = re.compile(r"^[a-z_]+\.[0-9a-f]+(-[0-9a-f]+\.delta)?\.json$")
+
+
+def serialize(data):
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def content_hash(body):
+    return hashlib.sha256(body).hexdigest()[:CONTENT_HASH_LENGTH]
+
+
+def records_by_key(data, key):
+    """{record key: record} of a dataset, which is either an object keyed by id or a list."""
+    if isinstance(data, dict):
+        return {str(record_key): record for record_key, record in data.items()}
+    return {str(record[key]): record for record in data}
+
+
+def build_delta(old_records, new_records):
+    """Returns (records added or changed, keys removed) between two versions."""
+    upsert = {key: record for key, record in new_records.items() if old_records.get(key) != record}
+    delete = sorted(key for key in old_records if key not in new_records)
+    return upsert, delete
+
+
+def data_url_prefix(public_dir, data_dir):
+    """The path of data_dir relative to public_dir, as the prefix of the paths in the manifest."""
+    relative = os.path.relpath(data_dir, public_dir)
+    if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+        raise ValueError(f"{data_dir} is not under {public_dir}, so the client could not fetch from it")
+    return "" if relative == os.curdir else relative.replace(os.sep, "/") + "/"
+
+
+def write_file(path, body):
+    if os.path.exists(path):
+        return  # Content-hashed, so an existing file already has these bytes
+    with open(f"{path}.part", "wb") as f:
+        f.write(body)
+    os.replace(f"{path}.part", path)
+
+
+def load_manifest(data_dir):
+    try:
+        with open(os.path.join(data_dir, MANIFEST_FILE), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"datasets": {}}
+    except (IOError, json.JSONDecodeError) as e:
+        print(f"Could not read the previous manifest, publishing without deltas: {e}")
+        return {"datasets": {}}
+
+
+def load_published(data_dir, name, version):
+    """The records of an earlier published version, or None when its file is gone."""
+    try:
+        with open(os.path.join(data_dir, f"{name}.{version}.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (IOError, json.JSONDecodeError):
+        return None
+
+
+def publish_dataset(name, source_file, key, previous_entry, data_dir=DATA_DIR, url_prefix="data/"):
+    """Writes the hashed file and the deltas from older versions, returns the manifest entry."""
+    with open(source_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        data = sorted(data, key=lambda record: record[key])
+    body = serialize(data)
+    version = content_hash(body)
+    write_file(os.path.join(data_dir, f"{name}.{version}.json"), body)
+
+    history = [version] + [old for old in (previous_entry or {}).get("history", []) if old != version]
+    history = history[:KEEP_VERSIONS + 1]
+    new_records = records_by_key(data, key)
+    deltas = {}
+    for old_version in history[1:]:
+        old_data = load_published(data_dir, name, old_version)
+        if old_data is None:
+            continue
+        upsert, delete = build_delta(records_by_key(old_data, key), new_records)
+        delta_body = serialize({"from": old_version, "to": version, "key": key, "upsert": upsert, "delete": delete})
+        if len(delta_body) > len(body) * MAX_DELTA_RATIO:
+            print(f"  {name}: delta from {old_version} is {len(delta_body) / 1024:.0f} KB, not worth publishing")
+            continue
+        delta_name = f"{name}.{old_version}-{version}.delta.json"
+        write_file(os.path.join(data_dir, delta_name), delta_body)
+        deltas[old_version] = url_prefix + delta_name
+        print(
+            f"  {name}: delta from {old_version}, {len(upsert)} changed, {len(delete)} removed "
+            f"({len(delta_body) / 1024:.1f} KB)"
+        )
+
+    if previous_entry and previous_entry.get("hash") == version:
+        print(f"  {name}: unchanged ({version})")
+    else:
+        print(f"  {name}: published {version}, {len(new_records)} records ({len(body) / 1024:.0f} KB)")
+    return {
+        "file": f"{url_prefix}{name}.{version}.json",
+        "hash": version,
+        "key": key,
+        "records": len(new_records),
+        "bytes": len(body),
+        "history": history,
+        "deltas": deltas,
+    }
+
+
+def remove_unreferenced(data_dir, manifest):
+    """Deletes published files the manifest no longer points at, keeping the versions deltas start from."""
+    # By file name only: every published file sits directly in data_dir, whatever prefix an entry was written with
+    keep = set()
+    for name, entry in manifest["datasets"].items():
+        keep.add(entry["file"].rsplit("/", 1)[-1])
+        keep.update(f"{name}.{version}.json" for version in entry["history"])
+        keep.update(path.rsplit("/", 1)[-1] for path in entry["deltas"].values())
+    removed = 0
+    for file_name in os.listdir(data_dir):
+        if PUBLISHED_FILE_PATTERN.match(file_name) and file_name not in keep:
+            os.remove(os.path.join(data_dir, file_name))
+            removed += 1
+    return removed
+
+
+def publish_datasets(names, public_dir=PUBLIC_DIR, data_dir=DATA_DIR):
+    url_prefix = data_url_prefix(public_dir, data_dir)
+    os.makedirs(data_dir, exist_ok=True)
+    previous = load_manifest(data_dir)
+    manifest = {"datasets": dict(previous["datasets"])}
+    for name in names:
+        source_file, key = DATASETS[name]
+        try:
+            manifest["datasets"][name] = publish_dataset(
+                name, os.path.join(public_dir, source_file), key, previous["datasets"].get(name), data_dir, url_prefix
+            )
+        except (IOError, json.JSONDecodeError, KeyError) as e:
+            print(f"  Error publishing {name} from {source_file}, keeping the previous version: {e}")
+
+    # The manifest goes last, so it never points at a file that isn't there yet
+    manifest_path = os.path.join(data_dir, MANIFEST_FILE)
+    with open(f"{manifest_path}.part", "w") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+    os.replace(f"{manifest_path}.part", manifest_path)
+    removed = remove_unreferenced(data_dir, manifest)
+    print(f"Manifest saved to {manifest_path} ({removed} unreferenced files removed)")
+    return manifest
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Publish the datasets under content-hashed names with deltas.")
+    parser.add_argument("--datasets", nargs="+", choices=list(DATASETS), default=list(DATASETS),
+                        help="Datasets to publish (default: all)")
+    parser.add_argument("--public-dir", default=PUBLIC_DIR,
+                        help=f"Where the scraped datasets are and the site is served from (default: {PUBLIC_DIR})")
+    parser.add_argument("--data-dir", default=DATA_DIR,
+                        help=f"Where published files go, somewhere under --public-dir (default: {DATA_DIR})")
+    args = parser.parse_args()
+    try:
+        data_url_prefix(args.public_dir, args.data_dir)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    publish_datasets(args.datasets, public_dir=args.public_dir, data_dir=args.data_dir)
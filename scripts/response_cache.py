@@ -0,0 +1,158 @@
+"""On-disk cache of wiki API responses, shared by the scrapers.
+
+Responses are stored in a single SQLite file, keyed on a hash of the endpoint
+plus the normalized request params. Every entry has its own expiry, the total
+size is capped with least-recently-used eviction, and an offline mode serves
+only from the cache so parser changes can be re-run without the network.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+DEFAULT_CACHE_DIR = ".cache"
+CACHE_FILE_NAME = "wiki_responses.sqlite"
+DEFAULT_TTL = 7 * 24 * 60 * 60  # One week
+DEFAULT_MAX_MB = 512
+
+
+class CacheMiss(Exception):
+    """Raised in offline mode when a request has no cached response."""
+
+
+def normalize_params(params):
+    """Returns a stable string form of the request params."""
+    return json.dumps(
+        {str(key): str(value) for key, value in params.items() if value is not None},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+
+
+def cache_key(endpoint, params):
+    return hashlib.sha256(f"{endpoint}?{normalize_params(params)}".encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_MB * 1024 * 1024, offline=False):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, CACHE_FILE_NAME)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        # One connection shared across worker threads, serialized by self.lock
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                params TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self.db.commit()
+        self.total_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, endpoint, params):
+        """Returns the cached JSON for a request, or None.
+
+        Expired entries are ignored, except in offline mode where a stale
+        response beats no response. Offline misses raise CacheMiss.
+        """
+        key = cache_key(endpoint, params)
+        now = time.time()
+        with self.lock:
+            row = self.db.execute(
+                "SELECT body, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (row[1] < now and not self.offline):
+                self.misses += 1
+                if self.offline:
+                    raise CacheMiss(f"No cached response for {endpoint}?{normalize_params(params)}")
+                return None
+            self.db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.db.commit()
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, endpoint, params, data, ttl=None):
+        """Stores a decoded JSON response, then evicts down to the size cap."""
+        key = cache_key(endpoint, params)
+        body = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self.lock:
+            previous = self.db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, endpoint, normalize_params(params), body, len(body), now, expires_at, now),
+            )
+            self.total_bytes += len(body) - (previous[0] if previous else 0)
+            self._evict()
+            self.db.commit()
+
+    def _evict(self):
+        """Drops least recently used entries until the cache fits in max_bytes."""
+        while self.total_bytes > self.max_bytes:
+            rows = self.db.execute(
+                "SELECT key, size FROM responses ORDER BY last_access LIMIT 100"
+            ).fetchall()
+            if not rows:
+                self.total_bytes = 0
+                break
+            for key, size in rows:
+                self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.total_bytes -= size
+                if self.total_bytes <= self.max_bytes:
+                    break
+
+    def purge_expired(self):
+        with self.lock:
+            self.db.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+            self.total_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            self.db.commit()
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+        print(f"Response cache: {self.hits} hits, {self.misses} misses, {self.total_bytes / 1024 / 1024:.1f} MB on disk")
+
+
+def add_cache_arguments(parser):
+    """Adds the shared cache command line flags to a scraper's argument parser."""
+    group = parser.add_argument_group("response cache")
+    group.add_argument("--cache", action="store_true",
+                       help="Read and write API responses through the on-disk cache")
+    group.add_argument("--offline", action="store_true",
+                       help="Serve every request from the cache and never touch the network (implies --cache)")
+    group.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                       help=f"Directory holding the cache database (default: {DEFAULT_CACHE_DIR})")
+    group.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL,
+                       help=f"Seconds before a cached response expires (default: {DEFAULT_TTL})")
+    group.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_MB,
+                       help=f"Size cap before least recently used entries are evicted (default: {DEFAULT_MAX_MB})")
+
+
+def cache_from_args(args):
+    """Builds a ResponseCache from parsed command line flags, or None when caching is off."""
+    if not (args.cache or args.offline):
+        return None
+    return ResponseCache(
+        cache_dir=args.cache_dir,
+        ttl=args.cache_ttl,
+        max_bytes=int(args.cache_max_mb * 1024 * 1024),
+        offline=args.offline,
+    )
@@ -0,0 +1,202 @@
+"""Per-phase timing and counters for a scraper run, shared by the scrapers.
+
+Each scraper wraps its stages (category enumeration, wikitext fetches,
+parsing, sleeps, output writes, ...) in `metrics.phase(name)`. Requests made
+inside a phase are charged to it, with their latency and size, and retries
+and skipped pages are counted by reason. At exit a summary table is printed
+and the same numbers are written as a JSON run report.
+
+Phase times are summed per thread, so with several fetch workers a phase can
+add up to more than the wall time of the run.
+"""
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds of the request latency histogram, in milliseconds
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000]
+OTHER_PHASE = "other"
+PROFILE_TOP_FUNCTIONS = 20
+
+
+def latency_bucket(seconds):
+    milliseconds = seconds * 1000
+    for bound in LATENCY_BUCKETS_MS:
+        if milliseconds <= bound:
+            return f"<={bound}ms"
+    return f">{LATENCY_BUCKETS_MS[-1]}ms"
+
+
+class RunMetrics:
+    def __init__(self, scraper, profile_parse=False):
+        self.scraper = scraper
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.phases = {}
+        self.status_codes = {}
+        self.latency_histogram = {latency_bucket(bound / 1000): 0 for bound in LATENCY_BUCKETS_MS}
+        self.latency_histogram[latency_bucket(float("inf"))] = 0
+        self.retries = {}
+        self.skips = {}
+        self.counters = {}
+        # cProfile can only profile one section at a time on newer Pythons, so parsing is serialized while profiling
+        self.profile_parse = profile_parse
+        self.profile_lock = threading.Lock()
+        self.profile_stats = None
+
+    def _phase_entry(self, name):
+        return self.phases.setdefault(
+            name, {"seconds": 0.0, "calls": 0, "requests": 0, "bytes": 0, "request_seconds": 0.0, "cache_hits": 0}
+        )
+
+    def current_phase(self):
+        stack = getattr(self.local, "phases", None)
+        return stack[-1] if stack else OTHER_PHASE
+
+    @contextmanager
+    def phase(self, name):
+        """Times the enclosed block and charges the requests made in it to `name`."""
+        stack = getattr(self.local, "phases", None)
+        if stack is None:
+            stack = self.local.phases = []
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stack.pop()
+            self.add_phase_time(name, time.perf_counter() - start)
+
+    def add_phase_time(self, name, seconds, calls=1):
+        """Charges time measured elsewhere, such as in a worker process, to a phase."""
+        with self.lock:
+            entry = self._phase_entry(name)
+            entry["seconds"] += seconds
+            entry["calls"] += calls
+
+    def record_request(self, seconds, size, status):
+        with self.lock:
+            entry = self._phase_entry(self.current_phase())
+            entry["requests"] += 1
+            entry["bytes"] += size
+            entry["request_seconds"] += seconds
+            self.status_codes[str(status)] = self.status_codes.get(str(status), 0) + 1
+            self.latency_histogram[latency_bucket(seconds)] += 1
+
+    def record_cache_hit(self):
+        with self.lock:
+            self._phase_entry(self.current_phase())["cache_hits"] += 1
+
+    def count_retry(self, reason):
+        with self.lock:
+            self.retries[reason] = self.retries.get(reason, 0) + 1
+
+    def count_skip(self, reason, count=1):
+        if not count:
+            return
+        with self.lock:
+            self.skips[reason] = self.skips.get(reason, 0) + count
+
+    def count(self, name, count=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + count
+
+    @contextmanager
+    def parse_profile(self):
+        """Profiles the enclosed parse step with cProfile when --profile-parse is on."""
+        if not self.profile_parse:
+            yield
+            return
+        with self.profile_lock:
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                if self.profile_stats is None:
+                    self.profile_stats = pstats.Stats(profile)
+                else:
+                    self.profile_stats.add(profile)
+
+    def report(self):
+        total_requests = sum(phase["requests"] for phase in self.phases.values())
+        return {
+            "scraper": self.scraper,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            "wall_seconds": round(time.perf_counter() - self.started, 3),
+            "phases": {
+                name: {key: round(value, 3) if isinstance(value, float) else value for key, value in phase.items()}
+                for name, phase in sorted(self.phases.items(), key=lambda item: -item[1]["seconds"])
+            },
+            "requests": {
+                "total": total_requests,
+                "bytes": sum(phase["bytes"] for phase in self.phases.values()),
+                "cache_hits": sum(phase["cache_hits"] for phase in self.phases.values()),
+                "status_codes": self.status_codes,
+                "latency_histogram": self.latency_histogram,
+            },
+            "retries": self.retries,
+            "skips": self.skips,
+            "counters": self.counters,
+        }
+
+    def print_summary(self, report):
+        print(f"\n--- Run summary ({self.scraper}, {report['wall_seconds']:.1f}s wall) ---")
+        print(f"{'phase':<24}{'seconds':>10}{'calls':>8}{'requests':>10}{'MB':>8}{'avg ms':>8}{'cached':>8}")
+        for name, phase in report["phases"].items():
+            average = phase["request_seconds"] / phase["requests"] * 1000 if phase["requests"] else 0
+            print(
+                f"{name:<24}{phase['seconds']:>10.2f}{phase['calls']:>8}{phase['requests']:>10}"
+                f"{phase['bytes'] / 1024 / 1024:>8.2f}{average:>8.0f}{phase['cache_hits']:>8}"
+            )
+        requests = report["requests"]
+        print(f"Requests: {requests['total']} ({requests['bytes'] / 1024 / 1024:.1f} MB), "
+              f"{requests['cache_hits']} served from cache, status codes {requests['status_codes']}")
+        if requests["total"]:
+            print("Latency: " + ", ".join(f"{bucket} {n}" for bucket, n in requests["latency_histogram"].items() if n))
+        for label, counts in (("Retries", report["retries"]), ("Skips", report["skips"]), ("Counters", report["counters"])):
+            if counts:
+                print(f"{label}: " + ", ".join(f"{reason} {n}" for reason, n in sorted(counts.items())))
+
+    def finish(self, report_file, profile_file=None):
+        """Prints the summary table and writes the JSON report (and the parse profile, if any)."""
+        report = self.report()
+        self.print_summary(report)
+        try:
+            with open(report_file, "w") as f:
+                json.dump(report, f, indent=4)
+            print(f"Run report saved to {report_file}")
+        except IOError as e:
+            print(f"Error writing run report to {report_file}: {e}")
+
+        if self.profile_stats is not None and profile_file:
+            self.profile_stats.dump_stats(profile_file)
+            top = io.StringIO()
+            pstats.Stats(profile_file, stream=top).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+            print(top.getvalue())
+            print(f"Parse profile saved to {profile_file} (open with python -m pstats)")
+        return report
+
+
+def add_metrics_arguments(parser, default_report):
+    """Adds the shared run report flags to a scraper's argument parser."""
+    group = parser.add_argument_group("run report")
+    group.add_argument("--report", default=default_report,
+                       help=f"Where to write the JSON run report (default: {default_report})")
+    group.add_argument("--profile-parse", action="store_true",
+                       help="Run cProfile over the parse stage and save the stats next to the report")
+
+
+def metrics_from_args(args, scraper):
+    return RunMetrics(scraper, profile_parse=args.profile_parse)
+
+
+def profile_file_for(report_file):
+    return report_file.rsplit(".", 1)[0] + "_parse.prof"
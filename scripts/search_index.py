@@ -0,0 +1,73 @@
+"""Prebuilt search index for the item search page.
+
+Written next to weapons_armor_with_stats.json by the item scraper (or rebuilt
+from it by running this module directly). Layout:
+
+    {
+        "keys": ["3rd age bow", ...],     normalized names, sorted
+        "names": ["3rd age bow", ...],    display names, same order
+        "ids": [12424, ...],              item ids, same order
+        "trigrams": {"  3": [0, 1], ...}, trigram -> ascending positions
+        "facets": {"slot": {"2h": [0, ...]}, "combatstyle": {"Bow": [0, ...]}}
+    }
+
+Prefix lookup is a binary search over "keys". Fuzzy lookup intersects or
+scores the trigram postings of the query. Facets are position lists that can
+be intersected with either result, so no lookup walks the whole item table.
+"""
+import json
+import re
+
+ITEMS_FILE = "../frontend/public/weapons_armor_with_stats.json"
+SEARCH_INDEX_FILE = "../frontend/public/weapons_armor_search_index.json"
+FACETS = ["slot", "combatstyle"]
+
+NON_ALPHANUMERIC = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(name):
+    """Lowercases and collapses punctuation, so "Ava's assembler" matches "avas assembler"."""
+    return NON_ALPHANUMERIC.sub(" ", name.lower().replace("'", "")).strip()
+
+
+def trigrams(key):
+    """Trigrams of a normalized name, padded so word starts weigh more."""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def build_search_index(items):
+    entries = sorted(
+        ((normalize(item["name"]), item["name"], int(item["id"]), item["stats"]) for item in items.values()),
+        key=lambda entry: (entry[0], entry[2]),
+    )
+
+    index = {
+        "keys": [entry[0] for entry in entries],
+        "names": [entry[1] for entry in entries],
+        "ids": [entry[2] for entry in entries],
+        "trigrams": {},
+        "facets": {facet: {} for facet in FACETS},
+    }
+    for position, (key, _, _, stats) in enumerate(entries):
+        for trigram in sorted(trigrams(key)):
+            index["trigrams"].setdefault(trigram, []).append(position)
+        for facet in FACETS:
+            value = stats.get(facet)
+            if isinstance(value, str) and value:
+                index["facets"][facet].setdefault(value, []).append(position)
+    return index
+
+
+def save_search_index(items, filename=SEARCH_INDEX_FILE):
+    try:
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(build_search_index(items), f, ensure_ascii=False, separators=(",", ":"))
+        print(f"  Successfully saved search index to {filename}")
+    except IOError as e:
+        print(f"  Error writing search index to {filename}: {e}")
+
+
+if __name__ == "__main__":
+    with open(ITEMS_FILE, "r", encoding="utf-8") as f:
+        save_search_index(json.load(f))
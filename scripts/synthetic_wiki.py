@@ -0,0 +1,259 @@
+"""api.php responses synthesized from the checked-in data, for the benchmarks.
+
+bench_scrapers.py and bench_infobox_extractor.py normally replay responses
+recorded by a --cache run, which only exist on the machine that made them.
+This module rebuilds the requests both scrapers make from
+weapons_armor_with_stats.json and monsters_bosses.json instead, so the
+benchmarks run on a fresh checkout and always match the current request
+params:
+
+    category listings   every item page in its slot category, every monster
+                        in Category:Monsters, 500 per response with cmcontinue
+    item pages          Infobox Item + Infobox Bonuses wikitext; items that
+                        differ only by a trailing "(...)" share one page with
+                        a switch infobox (astab1, astab2, ...)
+    monster pages       Infobox Monster wikitext with one |versionN per variant
+    smwbrowse           the stored properties of every variant, as SMW strings
+    ask                 the same properties typed the way ask returns them:
+                        numbers, booleans and {"fulltext", "namespace"} pages
+    prop=info           revision ids, a hash of the page content
+    prop=imageinfo      a made-up URL per file
+
+Every page gets the same few KB of plain wikitext after its infoboxes, so
+page size and parse cost are in the range of the real wiki. The bodies are
+deterministic, so runs can be compared with each other.
+"""
+import json
+import re
+import zlib
+
+ITEMS_FILE = "../frontend/public/weapons_armor_with_stats.json"
+MONSTERS_FILE = "../frontend/public/monsters_bosses.json"
+NO_VARIANT = "No variant"
+CATEGORY_PAGE_SIZE = 500
+
+SLOT_CATEGORIES = {
+    "weapon": "Category:Weapons",
+    "2h": "Category:Weapons",
+    "ammo": "Category:Ammunition_slot_items",
+    "body": "Category:Body_slot_items",
+    "cape": "Category:Cape_slot_items",
+    "feet": "Category:Feet_slot_items",
+    "hands": "Category:Hands_slot_items",
+    "head": "Category:Head_slot_items",
+    "legs": "Category:Legs_slot_items",
+    "neck": "Category:Neck_slot_items",
+    "ring": "Category:Ring_slot_items",
+    "shield": "Category:Shield_slot_items",
+}
+# Stat key -> wiki parameter, the reverse of infobox_extractor.STAT_PARAMS
+BONUS_PARAMS = {
+    "stab_attack": "astab",
+    "slash_attack": "aslash",
+    "crush_attack": "acrush",
+    "magic_attack": "amagic",
+    "ranged_attack": "arange",
+    "stab_defence": "dstab",
+    "slash_defence": "dslash",
+    "crush_defence": "dcrush",
+    "magic_defence": "dmagic",
+    "ranged_defence": "drange",
+    "melee_strength": "str",
+    "ranged_strength": "rstr",
+    "magic_damage": "mdmg",
+    "prayer": "prayer",
+    "slot": "slot",
+    "speed": "speed",
+    "attackrange": "attackrange",
+    "combatstyle": "combatstyle",
+}
+UNSIGNED_PARAMS = {"slot", "speed", "attackrange", "combatstyle"}
+PAGE_BODY = (
+    "\n==Uses==\n"
+    + "It is used in {{plink|Some item}} and [[Some other page|other]] things, "
+      "see [[Special:WhatLinksHere]] for more. " * 40
+    + "\n==Changes==\n{{Subject changes footer}}\n"
+)
+VARIANT_SUFFIX = re.compile(r"^(.*?)\s*\(([^()]*)\)$")
+SMW_PAGE = re.compile(r"^(.*)#(\d+)##$")  # smwbrowse page values, "A_Doubt.png#6##"
+SMW_INTEGER = re.compile(r"^-?\d+$")
+NAMESPACE_PREFIXES = {0: "", 6: "File:", 10: "Template:", 14: "Category:"}
+
+
+def revision_id(text):
+    return zlib.crc32(text.encode("utf-8")) + 1
+
+
+def bonus_value(param, value):
+    if param in UNSIGNED_PARAMS or not isinstance(value, (int, float)):
+        return str(value)
+    return f"{value:+g}"
+
+
+def item_wikitext(versions):
+    """Infobox Item and Infobox Bonuses for [(version name or None, item)], switched when there are several."""
+    numbered = len(versions) > 1
+    item_lines = ["{{Infobox Item"]
+    bonus_lines = ["{{Infobox Bonuses"]
+    for number, (version, item) in enumerate(versions, 1):
+        suffix = str(number) if numbered else ""
+        if numbered:
+            item_lines.append(f"|version{suffix} = {version}")
+        item_lines += [
+            f"|name{suffix} = {item['name']}",
+            f"|id{suffix} = {item['id']}",
+            f"|image{suffix} = [[File:{item['name']}.png]]",
+        ]
+        bonus_lines += [
+            f"|{param}{suffix} = {bonus_value(param, item['stats'].get(stat, 0))}"
+            for stat, param in BONUS_PARAMS.items()
+        ]
+    return "\n".join(item_lines + ["}}"] + bonus_lines + ["}}"]) + PAGE_BODY
+
+
+def monster_wikitext(monster):
+    variants = [name for name in monster["variants"] if name != NO_VARIANT]
+    lines = ["{{Infobox Monster", f"|name = {monster['name']}"]
+    lines += [f"|version{number} = {name}" for number, name in enumerate(variants, 1)]
+    return "\n".join(lines + ["}}"]) + PAGE_BODY
+
+
+def smw_string(value):
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return str(value)
+
+
+def ask_value(value):
+    """A stored smwbrowse string as an ask printout value."""
+    if not isinstance(value, str):
+        return value
+    page = SMW_PAGE.match(value)
+    if page:
+        namespace = int(page.group(2))
+        return {"fulltext": NAMESPACE_PREFIXES.get(namespace, "") + page.group(1).replace("_", " "), "namespace": namespace}
+    if SMW_INTEGER.match(value):
+        return int(value)
+    if value in ("t", "f"):
+        return value == "t"
+    return value
+
+
+class SyntheticWiki:
+    """Answers api.php params with synthesized JSON, standing in for a dict of recorded fixtures."""
+
+    def __init__(self, items_file=ITEMS_FILE, monsters_file=MONSTERS_FILE):
+        with open(items_file, "r", encoding="utf-8") as f:
+            items = sorted(json.load(f).values(), key=lambda item: item["name"])
+        with open(monsters_file, "r", encoding="utf-8") as f:
+            self.monsters = {monster["name"]: monster for monster in json.load(f)}
+
+        # Items named "Base (Version)" go on the page "Base" next to the item named "Base" itself
+        grouped = {}
+        for item in items:
+            match = VARIANT_SUFFIX.match(item["name"])
+            grouped.setdefault(match.group(1) if match else item["name"], []).append(item)
+        self.item_pages = {}
+        self.categories = {}
+        for base, members in grouped.items():
+            pages = {base: members} if len(members) > 1 else {member["name"]: [member] for member in members}
+            for title, page_items in pages.items():
+                versions = [
+                    (VARIANT_SUFFIX.match(item["name"]).group(2) if item["name"] != base else base, item)
+                    for item in page_items
+                ]
+                self.item_pages[title] = item_wikitext(versions if len(versions) > 1 else [(None, page_items[0])])
+                for category in {SLOT_CATEGORIES.get(item["stats"]["slot"]) for item in page_items} - {None}:
+                    self.categories.setdefault(category, []).append(title)
+        self.categories["Category:Monsters"] = sorted(self.monsters)
+        self.monster_pages = {name: monster_wikitext(monster) for name, monster in self.monsters.items()}
+
+    def __len__(self):
+        return len(self.item_pages) + len(self.monster_pages)
+
+    def get(self, key):
+        """The response body for normalized params (response_cache.normalize_params), or None."""
+        data = self.response(json.loads(key))
+        return None if data is None else json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+    def response(self, params):
+        action = params.get("action")
+        if action == "parse":
+            return self.parse(params)
+        if action == "smwbrowse":
+            return self.smwbrowse(params)
+        if action == "ask":
+            return self.ask(params)
+        if action == "query" and params.get("list") == "categorymembers":
+            return self.category_members(params)
+        if action == "query" and "titles" in params:
+            return self.query_titles(params)
+        return None
+
+    def page_text(self, title):
+        return self.item_pages.get(title) or self.monster_pages.get(title)
+
+    def category_members(self, params):
+        members = self.categories.get(params["cmtitle"], [])
+        limit = CATEGORY_PAGE_SIZE if params.get("cmlimit", "max") == "max" else int(params["cmlimit"])
+        start = int(params.get("cmcontinue", 0))
+        data = {"query": {"categorymembers": [{"ns": 0, "title": title} for title in members[start:start + limit]]}}
+        if start + limit < len(members):
+            data["continue"] = {"cmcontinue": str(start + limit), "continue": "-||"}
+        return data
+
+    def parse(self, params):
+        text = self.monster_pages.get(params["page"])
+        if text is None:
+            return {"error": {"code": "missingtitle", "info": "The page you specified doesn't exist."}}
+        # The scraper sends "formatVERSION", which the API doesn't recognise, so this is the version 1 shape
+        return {"parse": {"title": params["page"], "revid": revision_id(text), "wikitext": {"*": text}}}
+
+    def smwbrowse(self, params):
+        request = json.loads(params["params"])
+        monster = self.monsters.get(request["subject"], {"variants": {}})
+        variant = monster["variants"].get(request["subobject"].replace("_", " ") or NO_VARIANT, {})
+        data = [
+            {"property": prop, "dataitem": [{"type": 2, "item": smw_string(value)}]}
+            for prop, value in variant.items() if not isinstance(value, dict)
+        ]
+        return {"query": {"subject": request["subject"], "data": data}}
+
+    def ask(self, params):
+        parts = params["query"].split("|")
+        printouts = [part[1:].split("=")[0] for part in parts if part.startswith("?")]
+        options = dict(part.split("=", 1) for part in parts[1:] if not part.startswith("?"))
+        limit, offset = int(options.get("limit", 50)), int(options.get("offset", 0))
+        subjects = [
+            (name if variant == NO_VARIANT else f"{name}#{variant}", stats)
+            for name, monster in self.monsters.items() for variant, stats in monster["variants"].items()
+        ]
+        results = {
+            subject: {
+                "fulltext": subject,
+                "printouts": {prop: [ask_value(stats[prop])] if prop in stats else [] for prop in printouts},
+            }
+            for subject, stats in subjects[offset:offset + limit]
+        }
+        data = {"query": {"results": results}}
+        if offset + limit < len(subjects):
+            data["query-continue-offset"] = offset + limit
+        return data
+
+    def query_titles(self, params):
+        pages = []
+        for title in params["titles"].split("|"):
+            if params.get("prop") == "imageinfo":
+                pages.append({"title": title, "imageinfo": [{"url": f"https://example.invalid/images/{title}"}]})
+                continue
+            text = self.page_text(title)
+            if text is None:
+                pages.append({"title": title, "missing": True})
+            elif params.get("prop") == "revisions":
+                pages.append({
+                    "title": title,
+                    "revisions": [{"revid": revision_id(text), "slots": {"main": {"content": text}}}],
+                })
+            else:
+                pages.append({"title": title, "lastrevid": revision_id(text)})
+        return {"query": {"pages": pages}}
@@ -0,0 +1,193 @@
+"""Pooled client for the OSRS wiki API, shared by the scrapers.
+
+One keep-alive session (gzip, a descriptive User-Agent, a connection pool
+sized for the number of fetch threads) behind a shared token bucket, with
+retries on 429/5xx and connection errors, the on-disk response cache, run
+metrics, and an optional cap on the number of network requests per run.
+`query_continue` and `category_members` follow the API's `continue`
+pagination, so callers don't write their own continuation loops.
+"""
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from run_metrics import RunMetrics
+
+API_ENDPOINT = "https://oldschool.runescape.wiki/api.php"
+USER_AGENT = "ScapeMateScripts/1.0 (https://github.com/Froztbitten/ScapeMate; devonsphillips36@gmail.com) - Contact me if issues arise"
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 30
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RequestBudgetExceeded(Exception):
+    """Raised when a run has used up its --max-requests budget."""
+
+
+class WikiApiError(RuntimeError):
+    """Raised when the API answers with an "error" payload instead of results."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every fetch worker."""
+
+    def __init__(self, rate, capacity, metrics=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.metrics = metrics
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            if self.metrics is not None:
+                with self.metrics.phase("rate limit wait"):
+                    time.sleep(wait)
+            else:
+                time.sleep(wait)
+
+
+def backoff_delay(attempt, response=None):
+    """Full-jitter exponential backoff, honouring Retry-After when the wiki sends one."""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return float(retry_after) + random.uniform(0, BACKOFF_BASE)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+class WikiClient:
+    def __init__(self, endpoint=API_ENDPOINT, rate=None, burst=1, pool_size=DEFAULT_POOL_SIZE,
+                 timeout=DEFAULT_TIMEOUT, max_retries=MAX_RETRIES, cache=None, metrics=None, max_requests=None):
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.cache = cache
+        self.metrics = metrics if metrics is not None else RunMetrics("wiki")
+        self.rate_limiter = TokenBucket(rate, burst, self.metrics) if rate else None
+        self.max_requests = max_requests
+        self.requests_made = 0  # Network requests only, cache hits are free
+        self.lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": "gzip"})
+
+    def _spend_request(self):
+        with self.lock:
+            if self.max_requests is not None and self.requests_made >= self.max_requests:
+                raise RequestBudgetExceeded(f"Request budget of {self.max_requests} used up")
+            self.requests_made += 1
+
+    def get(self, params, fresh=False):
+        """GET the API and return the decoded JSON, through the cache, rate limit and retries.
+
+        `fresh` skips the cached copy (revision checks must see the live wiki)
+        unless the cache is offline.
+        """
+        if self.cache is not None and (not fresh or self.cache.offline):
+            cached = self.cache.get(self.endpoint, params)
+            if cached is not None:
+                self.metrics.record_cache_hit()
+                return cached
+
+        response = self._send(self.endpoint, params=params)
+        response.raise_for_status()
+        data = response.json()
+        # API errors are often temporary, replaying one for a week would hide the real data
+        if self.cache is not None and "error" not in data:
+            self.cache.put(self.endpoint, params, data)
+        return data
+
+    def fetch(self, url, headers=None):
+        """Raw GET of any wiki URL (images, ...), with the same pool, rate limit, retries and budget.
+
+        Returns the response; 304 Not Modified is returned as-is so callers can
+        make conditional requests.
+        """
+        response = self._send(url, headers=headers)
+        response.raise_for_status()
+        return response
+
+    def _send(self, url, params=None, headers=None):
+        for attempt in range(self.max_retries + 1):
+            self._spend_request()
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+                print(f"  {e.__class__.__name__}, retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+                self.metrics.count_retry(e.__class__.__name__)
+                with self.metrics.phase("retry backoff"):
+                    time.sleep(delay)
+                continue
+            self.metrics.record_request(time.perf_counter() - start, len(response.content), response.status_code)
+
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                delay = backoff_delay(attempt, response)
+                print(f"  HTTP {response.status_code}, retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+                self.metrics.count_retry(f"HTTP {response.status_code}")
+                with self.metrics.phase("retry backoff"):
+                    time.sleep(delay)
+                continue
+            return response
+
+    def query_continue(self, params, fresh=False):
+        """Yields every response of a query, following the `continue` values the API returns."""
+        last_continue = {}
+        while True:
+            data = self.get({**params, **last_continue}, fresh=fresh)
+            yield data
+            if "continue" not in data:
+                break
+            last_continue = data["continue"]
+
+    def category_members(self, category_title, limit="max"):
+        """Yields the title of every page in a category."""
+        params = {
+            "action": "query",
+            "list": "categorymembers",
+            "cmtitle": category_title,
+            "cmlimit": limit,
+            "format": "json",
+            "formatversion": "2",
+        }
+        for data in self.query_continue(params):
+            if "error" in data:
+                raise WikiApiError(f"API error listing {category_title}: {data['error'].get('info', data['error'])}")
+            for member in data.get("query", {}).get("categorymembers", []):
+                yield member["title"]
+
+    def close(self):
+        self.session.close()
+
+
+def add_client_arguments(parser):
+    """Adds the shared connection pool and request budget flags to a scraper's argument parser."""
+    group = parser.add_argument_group("wiki client")
+    group.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE,
+                       help=f"Keep-alive connections kept open to the wiki (default: {DEFAULT_POOL_SIZE})")
+    group.add_argument("--max-requests", type=int, default=None,
+                       help="Stop the run once this many network requests were made (cache hits are free)")